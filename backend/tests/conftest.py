@@ -21,6 +21,19 @@ def mock_environment():
         yield env_vars
 
 
+@pytest.fixture(scope="session")
+def orchestrator():
+    """Build one default ResearchOrchestrator shared across the session."""
+    with patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}):
+        from agent.orchestrator import ResearchOrchestrator
+        
+        shared = ResearchOrchestrator()
+    
+    yield shared
+    
+    shared._cleanup_thread_pool()
+
+
 @pytest.fixture
 def sample_research_topics():
     """Provide sample research topics for testing."""
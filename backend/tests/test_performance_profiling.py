@@ -7,12 +7,13 @@ Tests end-to-end timing from frontend input to final answer display.
 import sys
 import os
 import time
-import json
 import asyncio
 import aiohttp
+import orjson
 import statistics
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass, asdict
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple, TypedDict
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 import argparse
 
@@ -22,7 +23,34 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend/src'))
 from agent.profiling_orchestrator import ProfilingOrchestrator, create_profiling_orchestrator
 
 
-@dataclass
+class StepTimingDict(TypedDict, total=False):
+    """Serialized step timing, as produced by PerformanceProfile.to_dict()."""
+    duration: Optional[float]
+    details: Dict[str, Any]
+
+
+class ConcurrencyMetricsDict(TypedDict, total=False):
+    """Concurrency metrics recorded for one batch of parallel searches."""
+    queries_count: int
+    total_duration: float
+    max_timing: float
+
+
+class PerformanceProfileDict(TypedDict, total=False):
+    """Serialized performance profile returned by the profiling orchestrator."""
+    total_duration: float
+    frontend_to_backend: Optional[float]
+    backend_processing: Optional[float]
+    backend_to_frontend: Optional[float]
+    query_generation: StepTimingDict
+    initial_searches: List[StepTimingDict]
+    reflection_loops: List[StepTimingDict]
+    finalization: StepTimingDict
+    memory_usage: Dict[str, Any]
+    concurrency_metrics: Dict[str, ConcurrencyMetricsDict]
+
+
+@dataclass(frozen=True, slots=True)
 class TestScenario:
     """A test scenario with specific parameters."""
     name: str
@@ -33,59 +61,86 @@ class TestScenario:
     expected_duration_range: tuple = (5.0, 30.0)  # (min, max) expected seconds
 
 
-@dataclass
+@dataclass(slots=True)
 class TestResult:
     """Results from a single test run."""
     scenario_name: str
     success: bool
-    total_duration: float
-    performance_profile: Dict[str, Any]
+    total_duration_ns: int
+    performance_profile: PerformanceProfileDict
     error_message: Optional[str] = None
-    timestamp: str = None
-    
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = datetime.now().isoformat()
+    timestamp_ns: int = field(default_factory=time.time_ns)
+
+
+# Durations are measured with perf_counter_ns() and converted to seconds at report time
+_NS_PER_SECOND = 1_000_000_000
+
+# Field names used to flatten results without asdict()'s recursive deep copy
+_RESULT_FIELDS = tuple(f.name for f in fields(TestResult))
+
+
+# Test scenarios shared by every profiler instance
+SCENARIOS: Tuple[TestScenario, ...] = (
+    TestScenario(
+        name="simple_factual",
+        question="What is the largest city and capital of France?",
+        initial_search_query_count=1,
+        max_research_loops=1,
+        expected_duration_range=(2.0, 8.0)
+    ),
+    TestScenario(
+        name="medium_research",
+        question="What are the latest developments in quantum computing in 2024?",
+        initial_search_query_count=3,
+        max_research_loops=2,
+        expected_duration_range=(8.0, 20.0)
+    ),
+    TestScenario(
+        name="complex_analysis",
+        question="Compare the economic impacts of renewable energy adoption vs traditional fossil fuels in developing countries",
+        initial_search_query_count=5,
+        max_research_loops=3,
+        expected_duration_range=(15.0, 40.0)
+    ),
+    TestScenario(
+        name="technical_deep_dive",
+        question="Explain the technical architecture and performance characteristics of Kubernetes container orchestration, including recent improvements in version 1.29",
+        initial_search_query_count=4,
+        max_research_loops=2,
+        expected_duration_range=(10.0, 25.0)
+    )
+)
 
 
 class PerformanceProfiler:
     """Comprehensive performance profiling test suite."""
     
+    _REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=120)  # 2 minute timeout
+    _HEALTH_TIMEOUT = aiohttp.ClientTimeout(total=5)
+    
     def __init__(self, backend_url: str = "http://localhost:8000"):
         self.backend_url = backend_url.rstrip('/')
         self.results: List[TestResult] = []
+        self._session: Optional[aiohttp.ClientSession] = None
         
-        # Define test scenarios
-        self.scenarios = [
-            TestScenario(
-                name="simple_factual",
-                question="What is the largest city and capital of France?",
-                initial_search_query_count=1,
-                max_research_loops=1,
-                expected_duration_range=(2.0, 8.0)
-            ),
-            TestScenario(
-                name="medium_research",
-                question="What are the latest developments in quantum computing in 2024?",
-                initial_search_query_count=3,
-                max_research_loops=2,
-                expected_duration_range=(8.0, 20.0)
-            ),
-            TestScenario(
-                name="complex_analysis",
-                question="Compare the economic impacts of renewable energy adoption vs traditional fossil fuels in developing countries",
-                initial_search_query_count=5,
-                max_research_loops=3,
-                expected_duration_range=(15.0, 40.0)
-            ),
-            TestScenario(
-                name="technical_deep_dive",
-                question="Explain the technical architecture and performance characteristics of Kubernetes container orchestration, including recent improvements in version 1.29",
-                initial_search_query_count=4,
-                max_research_loops=2,
-                expected_duration_range=(10.0, 25.0)
-            )
-        ]
+        self.scenarios = SCENARIOS
+    
+    async def __aenter__(self) -> "PerformanceProfiler":
+        """Open the pooled HTTP session shared by health checks and API tests."""
+        self._session = aiohttp.ClientSession()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        """Close the pooled HTTP session."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    def _require_session(self) -> aiohttp.ClientSession:
+        """Return the pooled HTTP session, which only exists inside ``async with profiler``."""
+        if self._session is None:
+            raise RuntimeError("PerformanceProfiler HTTP session is not open; use it inside 'async with profiler:'")
+        return self._session
     
     async def test_direct_orchestrator(self, scenario: TestScenario, iterations: int = 1) -> List[TestResult]:
         """Test direct orchestrator performance (bypass HTTP)."""
@@ -102,7 +157,7 @@ class PerformanceProfiler:
             orchestrator = create_profiling_orchestrator()
             
             try:
-                start_time = time.perf_counter()
+                start_ns = time.perf_counter_ns()
                 
                 # Run the research with profiling
                 result = await orchestrator.run_research_async(
@@ -110,38 +165,36 @@ class PerformanceProfiler:
                     initial_search_query_count=scenario.initial_search_query_count,
                     max_research_loops=scenario.max_research_loops,
                     reasoning_model=scenario.reasoning_model,
-                    frontend_start_time=start_time  # Simulate frontend timing
+                    frontend_start_time=start_ns / _NS_PER_SECOND  # Simulate frontend timing
                 )
                 
-                end_time = time.perf_counter()
-                total_duration = end_time - start_time
+                total_duration_ns = time.perf_counter_ns() - start_ns
                 
                 # Create test result
                 test_result = TestResult(
                     scenario_name=f"{scenario.name}_direct",
                     success=True,
-                    total_duration=total_duration,
+                    total_duration_ns=total_duration_ns,
                     performance_profile=result.get("performance_profile", {}),
                 )
                 
                 results.append(test_result)
                 
-                print(f"   ✅ Completed in {total_duration:.2f}s")
+                print(f"   ✅ Completed in {total_duration_ns / _NS_PER_SECOND:.2f}s")
                 
             except Exception as e:
-                end_time = time.perf_counter()
-                total_duration = end_time - start_time
+                total_duration_ns = time.perf_counter_ns() - start_ns
                 
                 test_result = TestResult(
                     scenario_name=f"{scenario.name}_direct",
                     success=False,
-                    total_duration=total_duration,
+                    total_duration_ns=total_duration_ns,
                     performance_profile={},
                     error_message=str(e)
                 )
                 
                 results.append(test_result)
-                print(f"   ❌ Failed after {total_duration:.2f}s: {e}")
+                print(f"   ❌ Failed after {total_duration_ns / _NS_PER_SECOND:.2f}s: {e}")
             
             finally:
                 # Clean up orchestrator
@@ -157,94 +210,92 @@ class PerformanceProfiler:
         
         results = []
         
-        async with aiohttp.ClientSession() as session:
-            for i in range(iterations):
-                print(f"   Run {i+1}/{iterations}...")
+        session = self._require_session()
+        for i in range(iterations):
+            print(f"   Run {i+1}/{iterations}...")
+            
+            try:
+                # Simulate frontend timing
+                frontend_start_ns = time.perf_counter_ns()
                 
-                try:
-                    # Simulate frontend timing
-                    frontend_start = time.perf_counter()
-                    
-                    # Prepare request
-                    request_data = {
-                        "question": scenario.question,
-                        "initial_search_query_count": scenario.initial_search_query_count,
-                        "max_research_loops": scenario.max_research_loops
-                    }
-                    
-                    if scenario.reasoning_model:
-                        request_data["reasoning_model"] = scenario.reasoning_model
+                # Prepare request
+                request_data = {
+                    "question": scenario.question,
+                    "initial_search_query_count": scenario.initial_search_query_count,
+                    "max_research_loops": scenario.max_research_loops
+                }
+                
+                if scenario.reasoning_model:
+                    request_data["reasoning_model"] = scenario.reasoning_model
+                
+                # Make HTTP request
+                async with session.post(
+                    f"{self.backend_url}/research",
+                    json=request_data,
+                    timeout=self._REQUEST_TIMEOUT
+                ) as response:
                     
-                    # Make HTTP request
-                    async with session.post(
-                        f"{self.backend_url}/research",
-                        json=request_data,
-                        timeout=aiohttp.ClientTimeout(total=120)  # 2 minute timeout
-                    ) as response:
+                    if response.status == 200:
+                        result = await response.json()
+                        total_duration_ns = time.perf_counter_ns() - frontend_start_ns
+                        
+                        # Extract performance profile if available
+                        performance_profile: PerformanceProfileDict = result.get("performance_profile", {})
+                        
+                        test_result = TestResult(
+                            scenario_name=f"{scenario.name}_http",
+                            success=True,
+                            total_duration_ns=total_duration_ns,
+                            performance_profile=performance_profile
+                        )
+                        
+                        results.append(test_result)
+                        print(f"   ✅ Completed in {total_duration_ns / _NS_PER_SECOND:.2f}s")
                         
-                        if response.status == 200:
-                            result = await response.json()
-                            end_time = time.perf_counter()
-                            total_duration = end_time - frontend_start
-                            
-                            # Extract performance profile if available
-                            performance_profile = result.get("performance_profile", {})
-                            
-                            test_result = TestResult(
-                                scenario_name=f"{scenario.name}_http",
-                                success=True,
-                                total_duration=total_duration,
-                                performance_profile=performance_profile
-                            )
-                            
-                            results.append(test_result)
-                            print(f"   ✅ Completed in {total_duration:.2f}s")
-                            
-                        else:
-                            error_text = await response.text()
-                            end_time = time.perf_counter()
-                            total_duration = end_time - frontend_start
-                            
-                            test_result = TestResult(
-                                scenario_name=f"{scenario.name}_http",
-                                success=False,
-                                total_duration=total_duration,
-                                performance_profile={},
-                                error_message=f"HTTP {response.status}: {error_text}"
-                            )
-                            
-                            results.append(test_result)
-                            print(f"   ❌ Failed after {total_duration:.2f}s: HTTP {response.status}")
+                    else:
+                        error_text = await response.text()
+                        total_duration_ns = time.perf_counter_ns() - frontend_start_ns
+                        
+                        test_result = TestResult(
+                            scenario_name=f"{scenario.name}_http",
+                            success=False,
+                            total_duration_ns=total_duration_ns,
+                            performance_profile={},
+                            error_message=f"HTTP {response.status}: {error_text}"
+                        )
+                        
+                        results.append(test_result)
+                        print(f"   ❌ Failed after {total_duration_ns / _NS_PER_SECOND:.2f}s: HTTP {response.status}")
+            
+            except Exception as e:
+                total_duration_ns = time.perf_counter_ns() - frontend_start_ns
                 
-                except Exception as e:
-                    end_time = time.perf_counter()
-                    total_duration = end_time - frontend_start
-                    
-                    test_result = TestResult(
-                        scenario_name=f"{scenario.name}_http",
-                        success=False,
-                        total_duration=total_duration,
-                        performance_profile={},
-                        error_message=str(e)
-                    )
-                    
-                    results.append(test_result)
-                    print(f"   ❌ Failed after {total_duration:.2f}s: {e}")
+                test_result = TestResult(
+                    scenario_name=f"{scenario.name}_http",
+                    success=False,
+                    total_duration_ns=total_duration_ns,
+                    performance_profile={},
+                    error_message=str(e)
+                )
+                
+                results.append(test_result)
+                print(f"   ❌ Failed after {total_duration_ns / _NS_PER_SECOND:.2f}s: {e}")
         
         return results
     
     async def check_backend_health(self) -> bool:
         """Check if the backend is healthy and responding."""
+        # Outside the try, so a missing session isn't reported as an unreachable backend
+        session = self._require_session()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.backend_url}/health", timeout=aiohttp.ClientTimeout(total=5)) as response:
-                    if response.status == 200:
-                        health_data = await response.json()
-                        print(f"✅ Backend healthy: {health_data}")
-                        return True
-                    else:
-                        print(f"❌ Backend unhealthy: HTTP {response.status}")
-                        return False
+            async with session.get(f"{self.backend_url}/health", timeout=self._HEALTH_TIMEOUT) as response:
+                if response.status == 200:
+                    health_data = await response.json()
+                    print(f"✅ Backend healthy: {health_data}")
+                    return True
+                else:
+                    print(f"❌ Backend unhealthy: HTTP {response.status}")
+                    return False
         except Exception as e:
             print(f"❌ Backend unreachable: {e}")
             return False
@@ -260,7 +311,7 @@ class PerformanceProfiler:
         
         # Calculate summary statistics
         if successful_results:
-            durations = [r.total_duration for r in successful_results]
+            durations = [r.total_duration_ns / _NS_PER_SECOND for r in successful_results]
             duration_stats = {
                 "count": len(durations),
                 "min": min(durations),
@@ -288,12 +339,15 @@ class PerformanceProfiler:
             "duration_statistics": duration_stats,
             "step_analysis": step_analysis,
             "performance_insights": insights,
-            "detailed_results": [asdict(result) for result in self.results],
+            "detailed_results": [
+                {name: getattr(result, name) for name in _RESULT_FIELDS}
+                for result in self.results
+            ],
             "failed_tests": [
                 {
                     "scenario": result.scenario_name,
                     "error": result.error_message,
-                    "duration": result.total_duration
+                    "duration": result.total_duration_ns / _NS_PER_SECOND
                 } for result in failed_results
             ],
             "timestamp": datetime.now().isoformat()
@@ -313,23 +367,18 @@ class PerformanceProfiler:
         for result in successful_results:
             profile = result.performance_profile
             
-            # Query generation timing
-            if profile.get("query_generation", {}).get("duration"):
-                step_timings["query_generation"].append(profile["query_generation"]["duration"])
+            # Single pass over the profile: scalar steps first, then the per-call lists
+            if (query_gen := profile.get("query_generation")) and (duration := query_gen.get("duration")):
+                step_timings["query_generation"].append(duration)
+            if (finalization := profile.get("finalization")) and (duration := finalization.get("duration")):
+                step_timings["finalization"].append(duration)
             
-            # Search timings
-            for search in profile.get("initial_searches", []):
-                if search.get("duration"):
-                    step_timings["initial_searches"].append(search["duration"])
-            
-            # Reflection timings
-            for reflection in profile.get("reflection_loops", []):
-                if reflection.get("duration"):
-                    step_timings["reflection_loops"].append(reflection["duration"])
-            
-            # Finalization timing
-            if profile.get("finalization", {}).get("duration"):
-                step_timings["finalization"].append(profile["finalization"]["duration"])
+            step_timings["initial_searches"].extend(
+                duration for s in profile.get("initial_searches", ()) if (duration := s.get("duration"))
+            )
+            step_timings["reflection_loops"].extend(
+                duration for r in profile.get("reflection_loops", ()) if (duration := r.get("duration"))
+            )
         
         # Calculate statistics for each step
         step_stats = {}
@@ -356,8 +405,8 @@ class PerformanceProfiler:
             return ["No successful tests to analyze"]
         
         # Analyze bottlenecks
-        total_durations = [r.total_duration for r in successful_results]
-        avg_duration = statistics.mean(total_durations)
+        total_durations_ns = [r.total_duration_ns for r in successful_results]
+        avg_duration = statistics.mean(total_durations_ns) / _NS_PER_SECOND
         
         if avg_duration > 20:
             insights.append("⚠️ Average response time exceeds 20 seconds - consider optimization")
@@ -375,45 +424,58 @@ class PerformanceProfiler:
         if step_analysis.get("reflection_loops", {}).get("mean", 0) > 3:
             insights.append("🤔 Reflection loops are slow - consider model optimization")
         
-        # Check concurrency effectiveness
+        # Check concurrency effectiveness, aggregated per search type across all results
+        efficiencies: Dict[str, List[float]] = defaultdict(list)
         for result in successful_results:
             concurrency_metrics = result.performance_profile.get("concurrency_metrics", {})
             for search_type, metrics in concurrency_metrics.items():
                 if metrics.get("queries_count", 0) > 1:
-                    parallel_efficiency = metrics.get("total_duration", 0) / metrics.get("max_timing", 1)
-                    if parallel_efficiency > 0.7:  # Good parallel efficiency
-                        insights.append(f"✅ {search_type} shows good parallel execution efficiency")
-                    else:
-                        insights.append(f"⚠️ {search_type} may benefit from better parallelization")
+                    efficiencies[search_type].append(metrics.get("total_duration", 0) / metrics.get("max_timing", 1))
+        
+        for search_type, values in efficiencies.items():
+            if statistics.mean(values) > 0.7:  # Good parallel efficiency
+                insights.append(f"✅ {search_type} shows good parallel execution efficiency")
+            else:
+                insights.append(f"⚠️ {search_type} may benefit from better parallelization")
         
         return insights
     
+    @staticmethod
+    def _print_scenario_banner(scenario: TestScenario) -> None:
+        """Print the header shown before a scenario's runs."""
+        min_duration, max_duration = scenario.expected_duration_range
+        print(f"\n📋 Scenario: {scenario.name.upper()}")
+        print(f"   Expected duration: {min_duration:.1f}s - {max_duration:.1f}s")
+    
     async def run_full_test_suite(self, iterations: int = 1, test_http: bool = True, test_direct: bool = True) -> Dict[str, Any]:
         """Run the complete performance test suite."""
+        if iterations <= 0 or not (test_http or test_direct):
+            return self.generate_performance_report()
+        
         print("🚀 Starting Comprehensive Performance Test Suite")
         print("=" * 60)
         
-        # Check backend health first
-        if test_http:
-            print("\n📡 Checking backend health...")
-            if not await self.check_backend_health():
-                print("❌ Backend is not healthy. Skipping HTTP tests.")
-                test_http = False
-        
-        # Run tests for each scenario
-        for scenario in self.scenarios:
-            print(f"\n📋 Scenario: {scenario.name.upper()}")
-            print(f"   Expected duration: {scenario.expected_duration_range[0]:.1f}s - {scenario.expected_duration_range[1]:.1f}s")
-            
-            # Test direct orchestrator
-            if test_direct:
-                direct_results = await self.test_direct_orchestrator(scenario, iterations)
-                self.results.extend(direct_results)
-            
-            # Test HTTP API
+        async with self:
+            # Check backend health first
             if test_http:
-                http_results = await self.test_http_api(scenario, iterations)
-                self.results.extend(http_results)
+                print("\n📡 Checking backend health...")
+                if not await self.check_backend_health():
+                    print("❌ Backend is not healthy. Skipping HTTP tests.")
+                    test_http = False
+                    if not test_direct:
+                        return self.generate_performance_report()
+            
+            # Run tests for each scenario
+            for scenario in self.scenarios:
+                self._print_scenario_banner(scenario)
+                
+                # Test direct orchestrator
+                if test_direct:
+                    self.results.extend(await self.test_direct_orchestrator(scenario, iterations))
+                
+                # Test HTTP API
+                if test_http:
+                    self.results.extend(await self.test_http_api(scenario, iterations))
         
         # Generate and return report
         print("\n📊 Generating performance report...")
@@ -427,8 +489,21 @@ class PerformanceProfiler:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"performance_report_{timestamp}.json"
         
-        with open(filename, 'w') as f:
-            json.dump(report, f, indent=2)
+        # Render per-result timestamps as ISO strings only when writing the file
+        if "detailed_results" in report:
+            report = {
+                **report,
+                "detailed_results": [
+                    {
+                        **{k: v for k, v in entry.items() if k != "timestamp_ns"},
+                        "timestamp": datetime.fromtimestamp(entry["timestamp_ns"] / _NS_PER_SECOND).isoformat(),
+                    }
+                    for entry in report["detailed_results"]
+                ],
+            }
+        
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
         
         return filename
 
@@ -7,47 +7,113 @@ Ensures that performance tests are using real search APIs, not fallback response
 import sys
 import os
 import asyncio
-import json
-from typing import List, Dict, Any
+import time
+from collections import Counter
+from functools import lru_cache, partial
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+import orjson
 
 # Add backend src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from agent.search.search_manager import search_web
-from agent.profiling_orchestrator import create_profiling_orchestrator
+from agent.profiling_orchestrator import ProfilingOrchestrator, create_profiling_orchestrator
+
+
+# URL substrings that identify a source kind without parsing the URL
+_URL_TAGS = (
+    ("grounding-api-redirect", "gemini_grounding"),
+    ("wikipedia.org", "wikipedia"),
+    ("example.com", "fallback"),
+)
+
+
+@lru_cache(maxsize=1024)
+def _classify_source_url(url: str) -> str:
+    """Map a source URL to a known source label or its domain."""
+    for tag, label in _URL_TAGS:
+        if tag in url:
+            return label
+    
+    try:
+        return urlparse(url).netloc
+    except ValueError:
+        return "unknown"
+
+
+def _short_label(question: str, width: int = 60) -> str:
+    """Truncate a question for log lines."""
+    return f"{question[:width]}..." if len(question) > width else question
+
+
+class _TokenBucket:
+    """Minimal asyncio token-bucket limiter: up to max_rate acquisitions per time_period."""
+    
+    def __init__(self, max_rate: float, time_period: float = 1.0):
+        self._capacity = max_rate
+        self._rate = max_rate / time_period
+        self._tokens = max_rate
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def __aenter__(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
 
 
 class SearchQualityValidator:
     """Validates that search operations are using real APIs, not fallbacks."""
     
+    _QUESTIONS = (
+        # Performance test questions
+        "What is the capital of France?",
+        "What are the latest developments in quantum computing in 2024?",
+        "Compare the economic impacts of renewable energy adoption vs traditional fossil fuels in developing countries",
+        "Explain the technical architecture and performance characteristics of Kubernetes container orchestration, including recent improvements in version 1.29",
+        
+        # Additional validation questions
+        "What happened in the 2024 US presidential election?",
+        "What are the current stock market trends for AI companies?",
+        "How does ChatGPT-4 compare to other large language models?",
+        "What are the environmental benefits of electric vehicles?",
+    )
+    
+    # (question, short label) pairs, built once when the class is defined
+    TEST_QUESTIONS = tuple((question, _short_label(question)) for question in _QUESTIONS)
+    
     def __init__(self):
-        self.test_questions = [
-            # Performance test questions
-            "What is the capital of France?",
-            "What are the latest developments in quantum computing in 2024?",
-            "Compare the economic impacts of renewable energy adoption vs traditional fossil fuels in developing countries",
-            "Explain the technical architecture and performance characteristics of Kubernetes container orchestration, including recent improvements in version 1.29",
-            
-            # Additional validation questions
-            "What happened in the 2024 US presidential election?",
-            "What are the current stock market trends for AI companies?",
-            "How does ChatGPT-4 compare to other large language models?",
-            "What are the environmental benefits of electric vehicles?",
-        ]
+        self.test_questions = list(self.TEST_QUESTIONS)
+        
+        # Gates live search calls instead of fixed sleeps between questions
+        self._limiter = _TokenBucket(max_rate=5, time_period=1.0)
     
-    async def validate_search_api(self, question: str) -> Dict[str, Any]:
+    async def validate_search_api(self, question: str, label: Optional[str] = None) -> Dict[str, Any]:
         """Validate a single search query for real API usage."""
-        print(f"🔍 Testing: {question[:60]}{'...' if len(question) > 60 else ''}")
+        print(f"🔍 Testing: {label or _short_label(question)}")
         
         try:
-            results = await search_web(question, 3)
+            async with self._limiter:
+                results = await search_web(question, 3)
             
             # Analyze results
             analysis = {
                 "question": question,
                 "total_results": len(results),
-                "sources": {},
+                "sources": Counter(),
                 "is_real_search": False,
                 "has_fallback": False,
                 "quality_score": 0.0,
@@ -57,7 +123,7 @@ class SearchQualityValidator:
             # Count source types
             for result in results:
                 source = result.get("source", "unknown")
-                analysis["sources"][source] = analysis["sources"].get(source, 0) + 1
+                analysis["sources"][source] += 1
                 
                 # Check for specific indicators
                 if source == "gemini_grounding":
@@ -107,11 +173,11 @@ class SearchQualityValidator:
                 "quality_score": 0.0
             }
     
-    async def validate_orchestrator_search(self, question: str) -> Dict[str, Any]:
+    async def validate_orchestrator_search(
+        self, orchestrator: ProfilingOrchestrator, question: str, label: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Validate search through the full orchestrator pipeline."""
-        print(f"\n🔬 Full orchestrator test: {question[:40]}{'...' if len(question) > 40 else ''}")
-        
-        orchestrator = create_profiling_orchestrator()
+        print(f"\n🔬 Full orchestrator test: {label or _short_label(question)}")
         
         try:
             result = await orchestrator.run_research_async(
@@ -128,34 +194,25 @@ class SearchQualityValidator:
                 "question": question,
                 "total_sources": len(sources),
                 "search_timing": {},
-                "source_domains": set(),
+                "source_domains": {},  # insertion-ordered set of domains
                 "is_comprehensive": False,
                 "performance_data": performance
             }
             
-            # Analyze sources
+            # Analyze sources, noting fallbacks as they are found
+            fallback_seen = False
             for source in sources:
                 url = source.get("url", "")
-                if url:
-                    if "grounding-api-redirect" in url:
-                        analysis["source_domains"].add("gemini_grounding")
-                    elif "wikipedia.org" in url:
-                        analysis["source_domains"].add("wikipedia")
-                    elif "example.com" in url:
-                        analysis["source_domains"].add("fallback")
-                    else:
-                        # Extract domain
-                        try:
-                            from urllib.parse import urlparse
-                            domain = urlparse(url).netloc
-                            analysis["source_domains"].add(domain)
-                        except:
-                            analysis["source_domains"].add("unknown")
+                if not url:
+                    continue
+                domain = _classify_source_url(url)
+                fallback_seen = fallback_seen or domain == "fallback"
+                analysis["source_domains"][domain] = None
             
-            # Check if comprehensive
+            # Check if comprehensive (cheapest disqualifiers first)
             analysis["is_comprehensive"] = (
+                not fallback_seen and
                 analysis["total_sources"] >= 2 and
-                "fallback" not in analysis["source_domains"] and
                 len(analysis["source_domains"]) > 0
             )
             
@@ -171,6 +228,9 @@ class SearchQualityValidator:
             print(f"   {status} - {analysis['total_sources']} sources from {len(analysis['source_domains'])} domains")
             print(f"   Domains: {', '.join(analysis['source_domains'])}")
             
+            # Report domains as a list in first-seen order
+            analysis["source_domains"] = list(analysis["source_domains"])
+            
             return analysis
             
         except Exception as e:
@@ -180,9 +240,25 @@ class SearchQualityValidator:
                 "error": str(e),
                 "is_comprehensive": False
             }
+    
+    @staticmethod
+    async def _run_bounded(
+        validate, questions: List[Tuple[str, str]], max_concurrency: int
+    ) -> List[Dict[str, Any]]:
+        """Run a validation coroutine over all questions concurrently, bounded by a semaphore."""
+        semaphore = asyncio.Semaphore(max_concurrency)
         
-        finally:
-            orchestrator._cleanup_thread_pool()
+        async def _one(question: str, label: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await validate(question, label)
+        
+        results = await asyncio.gather(*(_one(q, label) for q, label in questions), return_exceptions=True)
+        
+        # A single failure must not abort the batch; record it like the validators do
+        return [
+            {"question": question, "error": str(result)} if isinstance(result, Exception) else result
+            for (question, _), result in zip(questions, results)
+        ]
     
     async def run_validation_suite(self) -> Dict[str, Any]:
         """Run complete search quality validation."""
@@ -193,21 +269,27 @@ class SearchQualityValidator:
         print("\n📡 Direct Search API Validation")
         print("-" * 30)
         
-        direct_results = []
-        for question in self.test_questions[:4]:  # Test performance questions
-            result = await self.validate_search_api(question)
-            direct_results.append(result)
-            await asyncio.sleep(1)  # Rate limiting
+        direct_results = await self._run_bounded(
+            self.validate_search_api,
+            self.test_questions[:4],  # Test performance questions
+            max_concurrency=4
+        )
         
         # Test full orchestrator
         print("\n🔬 Full Orchestrator Validation")
         print("-" * 30)
         
-        orchestrator_results = []
-        for question in self.test_questions[:2]:  # Test fewer for orchestrator
-            result = await self.validate_orchestrator_search(question)
-            orchestrator_results.append(result)
-            await asyncio.sleep(2)  # More rate limiting for full tests
+        # One orchestrator serves every question; its profile is per-run instance state,
+        # so runs through it are serialized
+        orchestrator = create_profiling_orchestrator()
+        try:
+            orchestrator_results = await self._run_bounded(
+                partial(self.validate_orchestrator_search, orchestrator),
+                self.test_questions[:2],  # Test fewer for orchestrator
+                max_concurrency=1
+            )
+        finally:
+            orchestrator._cleanup_thread_pool()
         
         # Generate report
         report = self.generate_validation_report(direct_results, orchestrator_results)
@@ -217,20 +299,21 @@ class SearchQualityValidator:
     def generate_validation_report(self, direct_results: List[Dict], orchestrator_results: List[Dict]) -> Dict[str, Any]:
         """Generate comprehensive validation report."""
         
-        # Analyze direct search results
-        real_search_count = sum(1 for r in direct_results if r.get("is_real_search", False))
-        fallback_count = sum(1 for r in direct_results if r.get("has_fallback", False))
-        avg_quality = sum(r.get("quality_score", 0) for r in direct_results) / len(direct_results) if direct_results else 0
+        # Analyze direct search results and source distribution in one pass
+        real_search_count = 0
+        fallback_count = 0
+        quality_total = 0.0
+        all_sources = Counter()
+        for result in direct_results:
+            real_search_count += bool(result.get("is_real_search", False))
+            fallback_count += bool(result.get("has_fallback", False))
+            quality_total += result.get("quality_score", 0)
+            all_sources.update(result.get("sources", {}))
+        avg_quality = quality_total / len(direct_results) if direct_results else 0
         
         # Analyze orchestrator results
         comprehensive_count = sum(1 for r in orchestrator_results if r.get("is_comprehensive", False))
         
-        # Source distribution
-        all_sources = {}
-        for result in direct_results:
-            for source, count in result.get("sources", {}).items():
-                all_sources[source] = all_sources.get(source, 0) + count
-        
         # Generate insights
         insights = []
         
@@ -328,8 +411,7 @@ async def main():
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"search_quality_validation_{timestamp}.json"
     
-    with open(filename, 'w') as f:
-        json.dump(report, f, indent=2)
+    Path(filename).write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     
     print(f"\n💾 Detailed report saved to: {filename}")
     
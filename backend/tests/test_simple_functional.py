@@ -3,15 +3,25 @@
 Simple functional test without problematic dependencies.
 """
 
+import ast
+import importlib
 import os
 import sys
-import subprocess
 from pathlib import Path
+from unittest.mock import patch
 
 # Add src to Python path
 backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir / 'src'))
 
+# Environment the checks run under (previously passed to each subprocess)
+TEST_ENV = {"GEMINI_API_KEY": "test-key"}
+
+
+def _check_syntax(path: str) -> None:
+    """Parse a script without executing it; raises SyntaxError on invalid code."""
+    ast.parse(Path(path).read_text(), filename=path)
+
 
 def test_server_script_syntax():
     """Test that server script has valid syntax."""
@@ -19,18 +29,13 @@ def test_server_script_syntax():
     print("🚀 Testing server script syntax...")
     
     try:
-        # Test syntax by importing the script (without running)
-        result = subprocess.run([
-            'python3', '-c', 'import ast; ast.parse(open("run_server.py").read())'
-        ], capture_output=True, text=True, timeout=10)
+        _check_syntax("run_server.py")
+        print("✅ Server script has valid Python syntax")
+        return True
         
-        if result.returncode == 0:
-            print("✅ Server script has valid Python syntax")
-            return True
-        else:
-            print(f"❌ Server script syntax error: {result.stderr}")
-            return False
-            
+    except SyntaxError as e:
+        print(f"❌ Server script syntax error: {e}")
+        return False
     except Exception as e:
         print(f"❌ Server script test failed: {e}")
         return False
@@ -42,57 +47,50 @@ def test_cli_script_syntax():
     print("🖥️  Testing CLI script syntax...")
     
     try:
-        result = subprocess.run([
-            'python3', '-c', 'import ast; ast.parse(open("examples/cli_research.py").read())'
-        ], capture_output=True, text=True, timeout=10)
+        _check_syntax("examples/cli_research.py")
+        print("✅ CLI script has valid Python syntax")
+        return True
         
-        if result.returncode == 0:
-            print("✅ CLI script has valid Python syntax")
-            return True
-        else:
-            print(f"❌ CLI script syntax error: {result.stderr}")
-            return False
-            
+    except SyntaxError as e:
+        print(f"❌ CLI script syntax error: {e}")
+        return False
     except Exception as e:
         print(f"❌ CLI script test failed: {e}")
         return False
 
 
 def test_isolated_imports():
-    """Test imports in isolation to avoid dependency conflicts."""
+    """Test that the core modules import and expose their public names."""
     
     print("📦 Testing isolated imports...")
     
-    test_scripts = [
-        ("Configuration", "from agent.configuration import Configuration; print('Config OK')"),
-        ("State Models", "from agent.state import ResearchState, Message; print('State OK')"),
-        ("Utils", "from agent.utils import get_research_topic; print('Utils OK')"),
-        ("Prompts", "from agent.prompts import get_current_date; print('Prompts OK')"),
-        ("Schemas", "from agent.tools_and_schemas import SearchQueryList; print('Schemas OK')"),
+    test_imports = [
+        ("Configuration", "agent.configuration", ["Configuration"]),
+        ("State Models", "agent.state", ["ResearchState", "Message"]),
+        ("Utils", "agent.utils", ["get_research_topic"]),
+        ("Prompts", "agent.prompts", ["get_current_date"]),
+        ("Schemas", "agent.tools_and_schemas", ["SearchQueryList"]),
     ]
     
     passed = 0
     failed = 0
     
-    for name, script in test_scripts:
-        try:
-            env = os.environ.copy()
-            env['GEMINI_API_KEY'] = 'test-key'
-            
-            result = subprocess.run([
-                'python3', '-c', script
-            ], capture_output=True, text=True, timeout=5, env=env)
-            
-            if result.returncode == 0 and 'OK' in result.stdout:
-                print(f"✅ {name} import successful")
-                passed += 1
-            else:
-                print(f"❌ {name} import failed: {result.stderr}")
-                failed += 1
+    with patch.dict(os.environ, TEST_ENV):
+        for name, module_name, attributes in test_imports:
+            try:
+                module = importlib.import_module(module_name)
+                missing = [attr for attr in attributes if not hasattr(module, attr)]
                 
-        except Exception as e:
-            print(f"❌ {name} import exception: {e}")
-            failed += 1
+                if not missing:
+                    print(f"✅ {name} import successful")
+                    passed += 1
+                else:
+                    print(f"❌ {name} import failed: missing {', '.join(missing)}")
+                    failed += 1
+                    
+            except Exception as e:
+                print(f"❌ {name} import exception: {e}")
+                failed += 1
     
     return failed == 0
 
@@ -102,64 +100,43 @@ def test_pydantic_models_isolated():
     
     print("🔍 Testing Pydantic models...")
     
-    test_script = '''
-import os
-os.environ["GEMINI_API_KEY"] = "test-key"
-import sys
-sys.path.insert(0, "src")
-
-from agent.state import Message, Source, ResearchState
-from agent.state import QueryGenerationInput, QueryGenerationOutput
-
-# Test Message
-msg = Message(role="user", content="Hello")
-assert msg.role == "user"
-print("Message OK")
-
-# Test Source  
-src = Source(title="Test", url="https://test.com")
-assert src.title == "Test"
-print("Source OK")
-
-# Test ResearchState
-state = ResearchState()
-state.add_message("user", "Hello")
-assert len(state.messages) == 1
-print("ResearchState OK")
-
-# Test input schema
-query_input = QueryGenerationInput(
-    research_topic="Test", 
-    current_date="2025-01-08"
-)
-assert query_input.number_of_queries == 3
-print("QueryGenerationInput OK")
-
-# Test output schema
-query_output = QueryGenerationOutput(
-    queries=["q1", "q2"],
-    rationale="Test"
-)
-assert len(query_output.queries) == 2
-print("QueryGenerationOutput OK")
-
-print("All Pydantic tests passed")
-'''
-    
     try:
-        result = subprocess.run([
-            'python3', '-c', test_script
-        ], capture_output=True, text=True, timeout=10)
-        
-        if result.returncode == 0 and 'All Pydantic tests passed' in result.stdout:
-            print("✅ All Pydantic models work correctly")
-            return True
-        else:
-            print(f"❌ Pydantic test failed: {result.stderr}")
-            return False
+        with patch.dict(os.environ, TEST_ENV):
+            from agent.state import Message, Source, ResearchState
+            from agent.state import QueryGenerationInput, QueryGenerationOutput
+            
+            # Test Message
+            msg = Message(role="user", content="Hello")
+            assert msg.role == "user"
+            
+            # Test Source
+            src = Source(title="Test", url="https://test.com")
+            assert src.title == "Test"
             
+            # Test ResearchState
+            state = ResearchState()
+            state.add_message("user", "Hello")
+            assert len(state.messages) == 1
+            
+            # Test input schema
+            query_input = QueryGenerationInput(
+                research_topic="Test",
+                current_date="2025-01-08"
+            )
+            assert query_input.number_of_queries == 3
+            
+            # Test output schema
+            query_output = QueryGenerationOutput(
+                queries=["q1", "q2"],
+                rationale="Test"
+            )
+            assert len(query_output.queries) == 2
+        
+        print("✅ All Pydantic models work correctly")
+        return True
+        
     except Exception as e:
-        print(f"❌ Pydantic test exception: {e}")
+        print(f"❌ Pydantic test failed: {e!r}")
         return False
 
 
@@ -168,45 +145,27 @@ def test_fastapi_app_isolated():
     
     print("⚡ Testing FastAPI app...")
     
-    test_script = '''
-import os
-os.environ["GEMINI_API_KEY"] = "test-key"
-import sys
-sys.path.insert(0, "src")
-
-from agent.app import app
-from fastapi import FastAPI
-
-assert isinstance(app, FastAPI)
-print("FastAPI app created")
-
-# Check routes
-routes = [route.path for route in app.routes]
-print(f"Routes found: {routes}")
-
-required_routes = ['/research', '/health']
-for route in required_routes:
-    found = any(route in r for r in routes)
-    if not found:
-        raise Exception(f"Missing route: {route}")
-
-print("All required routes found")
-'''
-    
     try:
-        result = subprocess.run([
-            'python3', '-c', test_script  
-        ], capture_output=True, text=True, timeout=15)
-        
-        if result.returncode == 0 and 'All required routes found' in result.stdout:
-            print("✅ FastAPI app works correctly")
-            return True
-        else:
-            print(f"❌ FastAPI test failed: {result.stderr}")
-            return False
+        with patch.dict(os.environ, TEST_ENV):
+            from agent.app import app
+            from fastapi import FastAPI
+            
+            assert isinstance(app, FastAPI)
             
+            # Check routes
+            routes = [route.path for route in app.routes]
+            print(f"Routes found: {routes}")
+            
+            required_routes = ['/research', '/health']
+            for route in required_routes:
+                if not any(route in r for r in routes):
+                    raise Exception(f"Missing route: {route}")
+        
+        print("✅ FastAPI app works correctly")
+        return True
+        
     except Exception as e:
-        print(f"❌ FastAPI test exception: {e}")
+        print(f"❌ FastAPI test failed: {e!r}")
         return False
 
 
@@ -215,39 +174,28 @@ def test_compatibility_layer():
     
     print("🔄 Testing compatibility layer...")
     
-    test_script = '''
-import os
-os.environ["GEMINI_API_KEY"] = "test-key"
-import sys
-sys.path.insert(0, "src")
-
-from agent.orchestrator import ResearchOrchestrator
-from agent.configuration import Configuration
-
-# Check interface
-config = Configuration()
-orchestrator = ResearchOrchestrator(config)
-assert hasattr(orchestrator, 'run_research')
-assert hasattr(orchestrator, 'arun_research')
-
-print("Compatibility layer OK")
-'''
-    
+    orchestrator = None
     try:
-        result = subprocess.run([
-            'python3', '-c', test_script
-        ], capture_output=True, text=True, timeout=10)
-        
-        if result.returncode == 0 and 'Compatibility layer OK' in result.stdout:
-            print("✅ Compatibility layer works correctly")
-            return True
-        else:
-            print(f"❌ Compatibility test failed: {result.stderr}")
-            return False
+        with patch.dict(os.environ, TEST_ENV):
+            from agent.orchestrator import ResearchOrchestrator
+            from agent.configuration import Configuration
             
+            # Check interface
+            config = Configuration()
+            orchestrator = ResearchOrchestrator(config)
+            assert hasattr(orchestrator, 'run_research')
+            assert hasattr(orchestrator, 'arun_research')
+        
+        print("✅ Compatibility layer works correctly")
+        return True
+        
     except Exception as e:
-        print(f"❌ Compatibility test exception: {e}")
+        print(f"❌ Compatibility test failed: {e!r}")
         return False
+    
+    finally:
+        if orchestrator is not None:
+            orchestrator._cleanup_thread_pool()
 
 
 def run_simple_functional_tests():
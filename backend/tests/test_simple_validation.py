@@ -24,7 +24,7 @@ def test_list_operations():
 async def test_async_functionality():
     """Test async functionality works."""
     async def async_add(a, b):
-        await asyncio.sleep(0.01)  # Simulate async operation
+        await asyncio.sleep(0)  # Yield to the event loop without a real delay
         return a + b
     
     result = await async_add(2, 3)
@@ -4,14 +4,28 @@
 __version__ = "1.0.0"
 __author__ = "Deep Search AI Team"
 
-from .environment_validator import EnvironmentValidator
-from .orchestrator import ServiceOrchestrator
-from .config_manager import ConfigurationManager
-from .init_manager import InitializationManager
+import importlib
 
 __all__ = [
     "EnvironmentValidator",
     "ServiceOrchestrator", 
     "ConfigurationManager",
     "InitializationManager"
-]
\ No newline at end of file
+]
+
+# Public names are imported on first access (PEP 562) so importing the package stays cheap
+_LAZY_IMPORTS = {
+    "EnvironmentValidator": "environment_validator",
+    "ServiceOrchestrator": "orchestrator",
+    "ConfigurationManager": "config_manager",
+    "InitializationManager": "init_manager",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(f".{_LAZY_IMPORTS[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,7 +2,8 @@
 Custom exceptions for initialization system
 """
 
-from typing import List, Optional
+from itertools import chain
+from typing import List, Optional, Sequence
 
 
 class InitializationError(Exception):
@@ -56,19 +57,22 @@ class HealthCheckError(InitializationError):
 class ValidationResult:
     """Result of a validation check"""
     
+    __slots__ = ('success', 'component', 'message', 'suggestions', 'warnings', 'details')
+
     def __init__(
         self, 
         success: bool, 
         component: str,
         message: str = None,
-        suggestions: List[str] = None,
+        suggestions: Sequence[str] = None,
         warnings: List[str] = None,
         details: dict = None
     ):
         self.success = success
         self.component = component
         self.message = message or ("Validation passed" if success else "Validation failed")
-        self.suggestions = suggestions or []
+        # Stored as given so shared suggestion tuples aren't copied per result
+        self.suggestions = suggestions or ()
         self.warnings = warnings or []
         self.details = details or {}
 
@@ -81,43 +85,59 @@ class ValidationResult:
 
 
 class ValidationResults:
-    """Collection of validation results"""
+    """Collection of validation results
     
+    ``results`` is the real list; after mutating it directly, call
+    ``rebuild_indices()``. The ``failed_validations``, ``passed_validations``
+    and ``warnings`` lists are internal indices returned without copying -
+    treat them as read-only.
+    """
+    
+    __slots__ = ('results', '_passed', '_failed', '_warnings')
+
     def __init__(self, results: List[ValidationResult] = None):
         self.results = results or []
+        self.rebuild_indices()
 
     def add(self, result: ValidationResult):
         """Add a validation result"""
         self.results.append(result)
+        (self._passed if result.success else self._failed).append(result)
+        self._warnings.extend(result.warnings)
+
+    def rebuild_indices(self):
+        """Recompute passed/failed/warning indices after mutating results directly"""
+        self._passed = []
+        self._failed = []
+        for result in self.results:
+            (self._passed if result.success else self._failed).append(result)
+        self._warnings = list(chain.from_iterable(result.warnings for result in self.results))
 
     @property
     def all_passed(self) -> bool:
         """Check if all validations passed"""
-        return all(result.success for result in self.results)
+        return not self._failed
 
     @property
     def failed_validations(self) -> List[ValidationResult]:
-        """Get only failed validation results"""
-        return [result for result in self.results if not result.success]
+        """Get only failed validation results (read-only view of the internal index)"""
+        return self._failed
 
     @property
     def passed_validations(self) -> List[ValidationResult]:
-        """Get only passed validation results"""
-        return [result for result in self.results if result.success]
+        """Get only passed validation results (read-only view of the internal index)"""
+        return self._passed
 
     @property
     def warnings(self) -> List[str]:
-        """Get all warnings from all results"""
-        warnings = []
-        for result in self.results:
-            warnings.extend(result.warnings)
-        return warnings
+        """Get all warnings from all results (read-only view of the internal index)"""
+        return self._warnings
 
     def get_summary(self) -> str:
         """Get a summary of all validation results"""
         total = len(self.results)
-        passed = len(self.passed_validations)
-        failed = len(self.failed_validations)
+        passed = len(self._passed)
+        failed = len(self._failed)
         
         summary = f"Validation Summary: {passed}/{total} passed"
         if failed > 0:
@@ -126,7 +146,7 @@ class ValidationResults:
         return summary
 
     def __bool__(self):
-        return self.all_passed
+        return not self._failed
 
     def __iter__(self):
         return iter(self.results)
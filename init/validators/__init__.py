@@ -2,13 +2,7 @@
 Validation modules for environment prerequisites
 """
 
-from .base import BaseValidator
-from .api_validator import APIKeyValidator
-from .docker_validator import DockerValidator
-from .port_validator import PortValidator
-from .fs_validator import FileSystemValidator
-from .runtime_validator import RuntimeValidator
-from .network_validator import NetworkValidator
+import importlib
 
 __all__ = [
     "BaseValidator",
@@ -18,4 +12,24 @@ __all__ = [
     "FileSystemValidator",
     "RuntimeValidator",
     "NetworkValidator"
-]
\ No newline at end of file
+]
+
+# Validators are imported on first access (PEP 562) so using one doesn't load them all
+_LAZY_IMPORTS = {
+    "BaseValidator": "base",
+    "APIKeyValidator": "api_validator",
+    "DockerValidator": "docker_validator",
+    "PortValidator": "port_validator",
+    "FileSystemValidator": "fs_validator",
+    "RuntimeValidator": "runtime_validator",
+    "NetworkValidator": "network_validator",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(f".{_LAZY_IMPORTS[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
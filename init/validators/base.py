@@ -2,9 +2,11 @@
 Base validator class for all validation components
 """
 
+import asyncio
 import logging
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Hashable, Optional
 
 from ..exceptions import ValidationResult, ValidationError
 
@@ -12,6 +14,11 @@ from ..exceptions import ValidationResult, ValidationError
 class BaseValidator(ABC):
     """Base class for all validators"""
     
+    _UNKNOWN_FAILURE_SUGGESTIONS = (
+        "Check logs for detailed error information",
+        "Verify system configuration"
+    )
+    
     def __init__(self, config: Dict[str, Any] = None, logger: Optional[logging.Logger] = None):
         self.config = config or {}
         self.logger = logger or logging.getLogger(self.__class__.__name__)
@@ -22,11 +29,26 @@ class BaseValidator(ABC):
         """
         Perform validation check
         
+        Known failure modes must be reported as a failed ValidationResult;
+        exceptions are reserved for programmer errors.
+        
         Returns:
             ValidationResult: Result of validation with details
         """
         pass
     
+    async def validate_async(self) -> ValidationResult:
+        """
+        Perform validation check without blocking the event loop
+        
+        Validators with network I/O should override this; the default runs
+        validate() in a worker thread so validators can be gathered together.
+        
+        Returns:
+            ValidationResult: Result of validation with details
+        """
+        return await asyncio.to_thread(self.validate)
+    
     @property
     @abstractmethod
     def component_name(self) -> str:
@@ -57,14 +79,30 @@ class BaseValidator(ABC):
             )
         return value
     
-    def _cache_result(self, key: str, result: ValidationResult) -> ValidationResult:
+    def _cache_result(self, key: Hashable, result: ValidationResult) -> ValidationResult:
         """Cache validation result for performance"""
-        self._cache_result[key] = result
+        self._validation_cache[key] = (time.monotonic(), result)
         return result
     
-    def _get_cached_result(self, key: str) -> Optional[ValidationResult]:
-        """Get cached validation result"""
-        return self._validation_cache.get(key)
+    def _get_cached_result(self, key: Hashable, ttl: Optional[float] = None) -> Optional[ValidationResult]:
+        """Get cached validation result, ignoring entries older than ttl seconds"""
+        entry = self._validation_cache.get(key)
+        if entry is None:
+            return None
+        
+        cached_at, result = entry
+        if ttl is not None and time.monotonic() - cached_at >= ttl:
+            del self._validation_cache[key]
+            return None
+        return result
+    
+    def _validation_cache_key(self) -> Hashable:
+        """Cache key for the current component and configuration"""
+        try:
+            return (self.component_name, hash(frozenset(self.config.items())))
+        except TypeError:
+            # Unhashable config values (lists, dicts) fall back to their repr
+            return (self.component_name, repr(sorted(self.config.items())))
     
     def log_validation_start(self):
         """Log start of validation"""
@@ -95,7 +133,7 @@ class BaseValidator(ABC):
             success=False,
             component=self.component_name,
             message=message,
-            suggestions=suggestions or [],
+            suggestions=suggestions or (),
             details=details or {}
         )
     
@@ -106,17 +144,31 @@ class BaseValidator(ABC):
         Returns:
             ValidationResult: Result of validation
         """
+        cache_key = self._validation_cache_key()
+        cached = self._get_cached_result(cache_key, self.get_config_value('cache_ttl', 30))
+        if cached is not None:
+            self.logger.debug(f"Using cached {self.component_name} validation result")
+            return cached
+        
         self.log_validation_start()
         
         try:
             result = self.validate()
             self.log_validation_result(result)
+            
+            # Only successes are cached so failures are re-checked straight away
+            if result.success:
+                self._cache_result(cache_key, result)
+            else:
+                self._validation_cache.pop(cache_key, None)
             return result
         
-        except Exception as e:
+        # Safety net for environment/IO errors only (requests.RequestException is an
+        # OSError); anything else is a bug and should propagate
+        except (OSError, ValidationError) as e:
             error_result = self.create_failure_result(
                 f"Validation failed with error: {str(e)}",
-                ["Check logs for detailed error information", "Verify system configuration"]
+                self._UNKNOWN_FAILURE_SUGGESTIONS
             )
             self.log_validation_result(error_result)
             return error_result
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""
+Compatibility wrappers exposing the old agents.py helper functions.
+
+They are imported once per session by the test modules that need them;
+patch them here (``test._compat.<name>``) rather than in the importing module.
+"""
+
+import asyncio
+
+from agent.search.search_manager import search_web
+from agent.citation.grounding_processor import GroundingProcessor
+from agent.citation.citation_formatter import CitationFormatter
+
+
+async def search_with_gemini_grounding(query: str):
+    """Compatibility wrapper for Gemini grounding search."""
+    try:
+        from agent.search.gemini_search import GeminiSearchProvider
+        provider = GeminiSearchProvider()
+        result = await provider.search_with_grounding(query)
+        return result
+    except Exception as e:
+        return {
+            'status': 'error',
+            'error': str(e),
+            'grounding_used': False
+        }
+
+
+def run_async_search(query: str, num_results: int = 5, loop=None):
+    """Compatibility wrapper for async search.
+
+    Runs on ``loop`` when given, otherwise on a fresh loop via asyncio.run.
+    """
+    if loop is not None:
+        return loop.run_until_complete(search_web(query, num_results))
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(search_web(query, num_results))
+    raise RuntimeError("run_async_search() cannot be called from a running event loop; await search_web() instead")
+
+
+def add_inline_citations(response):
+    """Compatibility wrapper for adding inline citations."""
+    formatter = CitationFormatter()
+    return formatter.add_inline_citations(response)
+
+
+def extract_sources_from_grounding(response):
+    """Compatibility wrapper for extracting sources."""
+    processor = GroundingProcessor()
+    return processor.extract_sources_from_grounding(response)
+
+
+def create_citations_from_grounding(response):
+    """Compatibility wrapper for creating citations."""
+    processor = GroundingProcessor()
+    return processor.create_citations_from_grounding(response)
+
@@ -6,58 +6,110 @@ Provides mocks, fixtures, and test utilities.
 import pytest
 import os
 import asyncio
+import copy
+import functools
+import gc
+import operator
 from unittest.mock import MagicMock, patch, AsyncMock
 from typing import Dict, Any, List
 import sys
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
+from types import MappingProxyType, SimpleNamespace
 
 # Add the backend src directory to the Python path
 backend_src = Path(__file__).parent.parent / "backend" / "src"
 sys.path.insert(0, str(backend_src))
 
+# Shared placeholder returned by the mock agents' run(); nothing inspects it
+_RUN_RESULT = MagicMock()
+
 # Create a mock BaseAgent metaclass that works with subscripts
 class MockBaseAgentMeta(type):
     def __getitem__(cls, item):
         return cls  # Allow BaseAgent[Type1, Type2] syntax
         
 class MockBaseAgentClass(metaclass=MockBaseAgentMeta):
+    __slots__ = ("config",)
+    
     def __init__(self, *args, **kwargs):
         self.config = kwargs.get('config')
         
     def run(self, *args, **kwargs):
         """Mock run method for BaseAgent"""
-        return MagicMock()
+        return _RUN_RESULT
 
 # Mock BaseAgentConfig as well
 class MockBaseAgentConfig:
+    __slots__ = ("client", "temperature", "max_retries")
+    
     def __init__(self, *args, **kwargs):
         self.client = kwargs.get('client')
         self.temperature = kwargs.get('temperature', 1.0)
         self.max_retries = kwargs.get('max_retries', 2)
 
+
+_BASE_AGENT_TARGET = 'atomic_agents.agents.base_agent.BaseAgent'
+_BASE_AGENT_CONFIG_TARGET = 'atomic_agents.agents.base_agent.BaseAgentConfig'
+
+
+@contextmanager
+def _mocked_base_agent():
+    """Swap atomic_agents' BaseAgent and BaseAgentConfig for the local mocks."""
+    with patch(_BASE_AGENT_TARGET, MockBaseAgentClass), \
+            patch(_BASE_AGENT_CONFIG_TARGET, MockBaseAgentConfig):
+        yield
+
+
 # Mock the module-level API key check and BaseAgent before importing modules
-with patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}):
-    with patch('atomic_agents.agents.base_agent.BaseAgent', MockBaseAgentClass):
-        with patch('atomic_agents.agents.base_agent.BaseAgentConfig', MockBaseAgentConfig):
-            # Import the actual modules we're testing
-            from agent.state import (
-                QueryGenerationInput,
-                QueryGenerationOutput,
-                WebSearchInput,
-                WebSearchOutput,
-                ReflectionInput,
-                ReflectionOutput,
-                FinalizationInput,
-                FinalizationOutput,
-                Source,
-                Citation
-            )
-            from agent.configuration import Configuration
+with patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}), _mocked_base_agent():
+    # Import the actual modules we're testing
+    from agent.state import (
+        QueryGenerationInput,
+        QueryGenerationOutput,
+        WebSearchInput,
+        WebSearchOutput,
+        ReflectionInput,
+        ReflectionOutput,
+        FinalizationInput,
+        FinalizationOutput,
+        Source,
+        Citation
+    )
+    from agent.configuration import Configuration
 
 
-@pytest.fixture
+_DEFAULT_GROUNDING = ((("https://example.com/quantum", "Quantum Computing Research"), (0, 10, (0,))),)
+
+
+@functools.lru_cache(maxsize=32)
+def _build_grounded_response(text, chunks=_DEFAULT_GROUNDING):
+    """
+    Build a grounded response tree once per distinct (text, chunks).
+    
+    Each entry in chunks is ((uri, title), (start_index, end_index, chunk_indices)),
+    giving one grounding chunk and the support that cites it. Results are cached
+    and shared, so callers must deepcopy before handing them to a test.
+    """
+    grounding_chunks = []
+    grounding_supports = []
+    for (uri, title), (start_index, end_index, chunk_indices) in chunks:
+        grounding_chunks.append(SimpleNamespace(web=SimpleNamespace(uri=uri, title=title)))
+        grounding_supports.append(SimpleNamespace(
+            segment=SimpleNamespace(start_index=start_index, end_index=end_index),
+            grounding_chunk_indices=list(chunk_indices)
+        ))
+    
+    metadata = SimpleNamespace(grounding_chunks=grounding_chunks, grounding_supports=grounding_supports)
+    return SimpleNamespace(
+        text=text,
+        candidates=[SimpleNamespace(grounding_metadata=metadata)]
+    )
+
+
+@pytest.fixture(scope="module")
 def mock_environment():
-    """Mock environment variables for all tests."""
+    """Mock environment variables. Applied once per test module."""
     env_vars = {
         "GEMINI_API_KEY": "test-gemini-key-12345",
         "GOOGLE_API_KEY": "test-google-key-12345", 
@@ -65,45 +117,34 @@ def mock_environment():
         "SEARCHAPI_API_KEY": "test-searchapi-key-12345"
     }
     
-    with patch.dict(os.environ, env_vars, clear=False):
-        # Also patch the os.getenv calls in the modules that use them
-        with patch('os.getenv') as mock_getenv:
-            def mock_getenv_func(key, default=None):
-                return env_vars.get(key, default)
-            mock_getenv.side_effect = mock_getenv_func
-            yield env_vars
+    # Already in place (e.g. injected by CI) - skip the environ snapshot/restore
+    if all(os.environ.get(key) == value for key, value in env_vars.items()):
+        yield env_vars
+        return
+    
+    # os.getenv reads os.environ, so patching the mapping covers it too
+    with pytest.MonkeyPatch.context() as mp:
+        for key, value in env_vars.items():
+            mp.setenv(key, value)
+        yield env_vars
+
+
+@pytest.fixture(scope="module")
+def shared_loop():
+    """Event loop reused by the synchronous tests of a module that drive coroutines."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
 
 
 @pytest.fixture
 def mock_genai_client():
     """Mock Google GenAI client."""
+    # Fresh client per test so call history never leaks between tests
     mock_client = MagicMock()
-    
-    # Mock response with grounding metadata
-    mock_response = MagicMock()
-    mock_response.text = "This is a test response about quantum computing."
-    
-    # Mock grounding metadata structure
-    mock_candidate = MagicMock()
-    mock_grounding_metadata = MagicMock()
-    
-    # Mock chunks
-    mock_chunk = MagicMock()
-    mock_chunk.web.uri = "https://example.com/quantum"
-    mock_chunk.web.title = "Quantum Computing Research"
-    mock_grounding_metadata.grounding_chunks = [mock_chunk]
-    
-    # Mock supports
-    mock_support = MagicMock()
-    mock_support.segment.start_index = 0
-    mock_support.segment.end_index = 10
-    mock_support.grounding_chunk_indices = [0]
-    mock_grounding_metadata.grounding_supports = [mock_support]
-    
-    mock_candidate.grounding_metadata = mock_grounding_metadata
-    mock_response.candidates = [mock_candidate]
-    
-    mock_client.models.generate_content.return_value = mock_response
+    mock_client.models.generate_content.return_value = copy.deepcopy(
+        _build_grounded_response("This is a test response about quantum computing.")
+    )
     
     return mock_client
 
@@ -120,9 +161,9 @@ def mock_instructor_client():
     return mock_client
 
 
-@pytest.fixture
-def sample_query_generation_input():
-    """Sample input for query generation testing."""
+@pytest.fixture(scope="session")
+def _sample_query_generation_input_session():
+    """Sample input for query generation testing. Built once per session."""
     return QueryGenerationInput(
         research_topic="What are the latest developments in quantum computing?",
         number_of_queries=3,
@@ -131,8 +172,15 @@ def sample_query_generation_input():
 
 
 @pytest.fixture
-def sample_query_generation_output():
-    """Sample output for query generation testing."""
+def sample_query_generation_input(_sample_query_generation_input_session):
+    """Sample input for query generation testing (private copy, safe to mutate)."""
+    # Scalar-only model, so a shallow copy is already independent
+    return _sample_query_generation_input_session.model_copy()
+
+
+@pytest.fixture(scope="session")
+def _sample_query_generation_output_session():
+    """Sample output for query generation testing. Built once per session."""
     return QueryGenerationOutput(
         queries=[
             "quantum computing breakthroughs 2024",
@@ -144,8 +192,14 @@ def sample_query_generation_output():
 
 
 @pytest.fixture
-def sample_web_search_input():
-    """Sample input for web search testing."""
+def sample_query_generation_output(_sample_query_generation_output_session):
+    """Sample output for query generation testing (private copy, safe to mutate)."""
+    return copy.deepcopy(_sample_query_generation_output_session)
+
+
+@pytest.fixture(scope="session")
+def _sample_web_search_input_session():
+    """Sample input for web search testing. Built once per session."""
     return WebSearchInput(
         search_query="quantum computing breakthroughs 2024",
         query_id=1,
@@ -154,8 +208,15 @@ def sample_web_search_input():
 
 
 @pytest.fixture
-def sample_sources():
-    """Sample source objects."""
+def sample_web_search_input(_sample_web_search_input_session):
+    """Sample input for web search testing (private copy, safe to mutate)."""
+    # Scalar-only model, so a shallow copy is already independent
+    return _sample_web_search_input_session.model_copy()
+
+
+@pytest.fixture(scope="session")
+def _sample_sources_session():
+    """Sample source objects. Built once per session."""
     return [
         Source(
             title="Quantum Computing Research 2024",
@@ -173,8 +234,15 @@ def sample_sources():
 
 
 @pytest.fixture
-def sample_citations():
-    """Sample citation objects."""
+def sample_sources(_sample_sources_session):
+    """Sample source objects (private copy, safe to mutate)."""
+    # Source fields are scalars (quality_breakdown is unset), so per-item shallow copies suffice
+    return [source.model_copy() for source in _sample_sources_session]
+
+
+@pytest.fixture(scope="session")
+def _sample_citations_session():
+    """Sample citation objects. Built once per session."""
     return [
         Citation(
             start_index=0,
@@ -192,18 +260,34 @@ def sample_citations():
 
 
 @pytest.fixture
-def sample_web_search_output(sample_sources, sample_citations):
-    """Sample output for web search testing."""
+def sample_citations(_sample_citations_session):
+    """Sample citation objects (private copy, safe to mutate)."""
+    return copy.deepcopy(_sample_citations_session)
+
+
+@pytest.fixture(scope="session")
+def _sample_web_search_output_session(_sample_sources_session, _sample_citations_session):
+    """Sample output for web search testing. Built once per session."""
     return WebSearchOutput(
         content="Quantum computing has made significant advances in 2024 with new algorithms and hardware improvements.",
-        sources=sample_sources,
-        citations=sample_citations
+        sources=_sample_sources_session,
+        citations=_sample_citations_session
     )
 
 
 @pytest.fixture
-def sample_reflection_input():
-    """Sample input for reflection testing."""
+def sample_web_search_output(_sample_web_search_output_session, sample_sources, sample_citations):
+    """Sample output for web search testing (private copy, safe to mutate)."""
+    output = copy.deepcopy(_sample_web_search_output_session)
+    # Share the test's own source/citation objects, as the non-cached fixture did
+    output.sources = sample_sources
+    output.citations = sample_citations
+    return output
+
+
+@pytest.fixture(scope="session")
+def _sample_reflection_input_session():
+    """Sample input for reflection testing. Built once per session."""
     return ReflectionInput(
         research_topic="quantum computing developments",
         summaries=[
@@ -215,8 +299,14 @@ def sample_reflection_input():
 
 
 @pytest.fixture
-def sample_reflection_output():
-    """Sample output for reflection testing."""
+def sample_reflection_input(_sample_reflection_input_session):
+    """Sample input for reflection testing (private copy, safe to mutate)."""
+    return copy.deepcopy(_sample_reflection_input_session)
+
+
+@pytest.fixture(scope="session")
+def _sample_reflection_output_session():
+    """Sample output for reflection testing. Built once per session."""
     return ReflectionOutput(
         is_sufficient=False,
         knowledge_gap="Need more specific performance benchmarks",
@@ -225,31 +315,54 @@ def sample_reflection_output():
 
 
 @pytest.fixture
-def sample_finalization_input(sample_sources):
-    """Sample input for finalization testing."""
+def sample_reflection_output(_sample_reflection_output_session):
+    """Sample output for reflection testing (private copy, safe to mutate)."""
+    return copy.deepcopy(_sample_reflection_output_session)
+
+
+@pytest.fixture(scope="session")
+def _sample_finalization_input_session(_sample_sources_session):
+    """Sample input for finalization testing. Built once per session."""
     return FinalizationInput(
         research_topic="quantum computing developments",
         summaries=[
             "Quantum computing has advanced with new hardware",
             "Performance improvements are significant"
         ],
-        sources=sample_sources,
+        sources=_sample_sources_session,
         current_date="January 15, 2024"
     )
 
 
 @pytest.fixture
-def sample_finalization_output(sample_sources):
-    """Sample output for finalization testing."""
+def sample_finalization_input(_sample_finalization_input_session, sample_sources):
+    """Sample input for finalization testing (private copy, safe to mutate)."""
+    finalization_input = copy.deepcopy(_sample_finalization_input_session)
+    # Agents match used sources against input sources, so both must share one list
+    finalization_input.sources = sample_sources
+    return finalization_input
+
+
+@pytest.fixture(scope="session")
+def _sample_finalization_output_session(_sample_sources_session):
+    """Sample output for finalization testing. Built once per session."""
     return FinalizationOutput(
         final_answer="Based on the research, quantum computing has made remarkable progress in 2024 with significant hardware and software improvements.",
-        used_sources=sample_sources[:2]
+        used_sources=_sample_sources_session[:2]
     )
 
 
 @pytest.fixture
+def sample_finalization_output(_sample_finalization_output_session, sample_sources):
+    """Sample output for finalization testing (private copy, safe to mutate)."""
+    finalization_output = copy.deepcopy(_sample_finalization_output_session)
+    finalization_output.used_sources = sample_sources[:2]
+    return finalization_output
+
+
+@pytest.fixture(scope="session")
 def mock_httpx_response():
-    """Mock httpx response for API calls."""
+    """Mock httpx response for API calls (shared across the session; treat as read-only)."""
     mock_response = MagicMock()
     mock_response.status_code = 200
     mock_response.json.return_value = {
@@ -264,9 +377,9 @@ def mock_httpx_response():
     return mock_response
 
 
-@pytest.fixture
-def mock_search_api_response():
-    """Mock SearchAPI.io response."""
+@pytest.fixture(scope="session")
+def _mock_search_api_response_session():
+    """Mock SearchAPI.io response. Built once per session."""
     return {
         "organic_results": [
             {
@@ -279,8 +392,14 @@ def mock_search_api_response():
 
 
 @pytest.fixture
-def mock_duckduckgo_response():
-    """Mock DuckDuckGo API response."""
+def mock_search_api_response(_mock_search_api_response_session):
+    """Mock SearchAPI.io response (private copy, safe to mutate)."""
+    return copy.deepcopy(_mock_search_api_response_session)
+
+
+@pytest.fixture(scope="session")
+def _mock_duckduckgo_response_session():
+    """Mock DuckDuckGo API response. Built once per session."""
     return {
         "AbstractText": "Quantum computing is a type of computation...",
         "Heading": "Quantum Computing",
@@ -295,8 +414,14 @@ def mock_duckduckgo_response():
 
 
 @pytest.fixture
-def test_configuration():
-    """Test configuration object."""
+def mock_duckduckgo_response(_mock_duckduckgo_response_session):
+    """Mock DuckDuckGo API response (private copy, safe to mutate)."""
+    return copy.deepcopy(_mock_duckduckgo_response_session)
+
+
+@pytest.fixture(scope="session")
+def _test_configuration_session():
+    """Test configuration object. Built once per session."""
     config = Configuration(
         query_generator_model="gemini-2.5-flash",
         reflection_model="gemini-2.5-flash", 
@@ -307,70 +432,44 @@ def test_configuration():
     return config
 
 
-@pytest.fixture
-def mock_grounding_response():
-    """Mock response from Gemini with grounding metadata."""
-    mock_response = MagicMock()
-    mock_response.text = "Quantum computing has achieved significant milestones in 2024. These developments include improved error correction and new quantum algorithms."
-    
-    # Create mock grounding metadata
-    mock_candidate = MagicMock()
-    mock_metadata = MagicMock()
-    
-    # Mock chunks
-    chunk1 = MagicMock()
-    chunk1.web.uri = "https://quantum-research.com/2024"
-    chunk1.web.title = "Quantum Research 2024"
-    
-    chunk2 = MagicMock()
-    chunk2.web.uri = "https://quantum-algorithms.org" 
-    chunk2.web.title = "Quantum Algorithms Research"
-    
-    mock_metadata.grounding_chunks = [chunk1, chunk2]
-    
-    # Mock supports
-    support1 = MagicMock()
-    support1.segment.start_index = 0
-    support1.segment.end_index = 65
-    support1.grounding_chunk_indices = [0]
-    
-    support2 = MagicMock() 
-    support2.segment.start_index = 66
-    support2.segment.end_index = 143  # Set to text length to ensure it's within bounds
-    support2.grounding_chunk_indices = [1]
-    
-    mock_metadata.grounding_supports = [support1, support2]
-    
-    mock_candidate.grounding_metadata = mock_metadata
-    mock_response.candidates = [mock_candidate]
-    
-    return mock_response
+@pytest.fixture(scope="session")
+def test_configuration(_test_configuration_session):
+    """Test configuration object, shared by the whole session; tests must not mutate it."""
+    return _test_configuration_session
 
 
 @pytest.fixture
-def event_loop():
-    """Create an event loop for async tests."""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    yield loop
-    loop.close()
+def mock_grounding_response():
+    """Mock response from Gemini with grounding metadata."""
+    return copy.deepcopy(_build_grounded_response(
+        "Quantum computing has achieved significant milestones in 2024. These developments include improved error correction and new quantum algorithms.",
+        (
+            (("https://quantum-research.com/2024", "Quantum Research 2024"), (0, 65, (0,))),
+            # end_index is the text length so the support stays within bounds
+            (("https://quantum-algorithms.org", "Quantum Algorithms Research"), (66, 143, (1,))),
+        )
+    ))
 
 
 class MockAgent:
     """Mock agent class for testing."""
     
+    __slots__ = ("config", "agent_config")
+    
     def __init__(self, config):
         self.config = config
         self.agent_config = config
         
     def run(self, input_data):
         """Mock run method."""
-        return MagicMock()
+        return _RUN_RESULT
 
 
 class MockAgentConfig:
     """Mock AgentConfig class since it's missing from imports."""
     
+    __slots__ = ("client", "temperature", "max_retries")
+    
     def __init__(self, client=None, temperature=1.0, max_retries=2):
         self.client = client
         self.temperature = temperature
@@ -383,6 +482,20 @@ def mock_agent_config(mock_instructor_client):
     return MockAgentConfig(client=mock_instructor_client)
 
 
+@functools.lru_cache(maxsize=8)
+def _mock_search_results(count):
+    """Read-only search results, built once per count."""
+    return tuple(
+        MappingProxyType({
+            "title": f"Test Result {i+1}",
+            "url": f"https://test{i+1}.com",
+            "snippet": f"This is test snippet {i+1}",
+            "source": "test_source"
+        })
+        for i in range(count)
+    )
+
+
 # Helper functions for testing
 class TestHelpers:
     """Helper functions for testing."""
@@ -390,57 +503,40 @@ class TestHelpers:
     @staticmethod
     def create_mock_response(text="Test response", has_grounding=True):
         """Create a mock response object."""
-        mock_response = MagicMock()
-        mock_response.text = text
+        if not has_grounding:
+            return SimpleNamespace(text=text, candidates=[])
         
-        if has_grounding:
-            mock_candidate = MagicMock()
-            mock_metadata = MagicMock()
-            
-            # Create minimal grounding structure
-            mock_chunk = MagicMock()
-            mock_chunk.web.uri = "https://test.com"
-            mock_chunk.web.title = "Test Source"
-            mock_metadata.grounding_chunks = [mock_chunk]
-            
-            mock_support = MagicMock()
-            mock_support.segment.start_index = 0
-            mock_support.segment.end_index = len(text)
-            mock_support.grounding_chunk_indices = [0]
-            mock_metadata.grounding_supports = [mock_support]
-            
-            mock_candidate.grounding_metadata = mock_metadata
-            mock_response.candidates = [mock_candidate]
-        else:
-            mock_response.candidates = []
-            
-        return mock_response
+        # Deep copy: tests edit nested fields such as segment.end_index
+        return copy.deepcopy(_build_grounded_response(
+            text, ((("https://test.com", "Test Source"), (0, len(text), (0,))),)
+        ))
     
     @staticmethod
     def create_mock_search_results(count=3):
-        """Create mock search results."""
-        return [
-            {
-                "title": f"Test Result {i+1}",
-                "url": f"https://test{i+1}.com",
-                "snippet": f"This is test snippet {i+1}",
-                "source": "test_source"
-            }
-            for i in range(count)
-        ]
+        """Create mock search results (shared and read-only)."""
+        return _mock_search_results(count)
     
-    @staticmethod
-    def validate_source_structure(source):
+    # One C-level getter per structure; raises AttributeError if any field is missing
+    _source_getter = staticmethod(operator.attrgetter("title", "url", "short_url", "label"))
+    _citation_getter = staticmethod(operator.attrgetter("start_index", "end_index", "segments"))
+    
+    @classmethod
+    def validate_source_structure(cls, source):
         """Validate source object structure."""
-        required_fields = ["title", "url", "short_url", "label"]
-        return all(hasattr(source, field) for field in required_fields)
+        try:
+            cls._source_getter(source)
+        except AttributeError:
+            return False
+        return True
     
-    @staticmethod
-    def validate_citation_structure(citation):
+    @classmethod
+    def validate_citation_structure(cls, citation):
         """Validate citation object structure.""" 
-        return (hasattr(citation, 'start_index') and 
-                hasattr(citation, 'end_index') and
-                hasattr(citation, 'segments'))
+        try:
+            cls._citation_getter(citation)
+        except AttributeError:
+            return False
+        return True
 
 
 @pytest.fixture
@@ -453,40 +549,87 @@ def test_helpers():
 def mock_agent_config_import():
     """Mock the AgentConfig import since tests expect it in agent.configuration."""
     with patch('agent.configuration.AgentConfig', MockAgentConfig):
-        with patch('atomic_agents.agents.base_agent.BaseAgentConfig', MockBaseAgentConfig):
+        with patch(_BASE_AGENT_CONFIG_TARGET, MockBaseAgentConfig):
             yield MockAgentConfig
 
 
-@pytest.fixture  
-def mock_agent_dependencies():
-    """Mock all agent dependencies in one place for cleaner tests."""
+@pytest.fixture(scope="session")
+def _agent_dependency_patches():
+    """Install the agent dependency patches once for the whole session."""
     # Use our MockBaseAgentClass that supports subscripting
     mock_base_agent_class = MockBaseAgentClass
     mock_base_agent_instance = MagicMock()
     
-    with patch('atomic_agents.agents.base_agent.BaseAgent', mock_base_agent_class):
-        with patch('atomic_agents.agents.base_agent.BaseAgentConfig', MockBaseAgentConfig):
-            with patch('agent.configuration.genai.configure'):
-                with patch('agent.configuration.instructor.from_gemini') as mock_from_gemini:
-                    with patch('agent.configuration.genai.GenerativeModel') as mock_model:
-                        with patch('google.generativeai.types.GoogleSearch', create=True) as mock_google_search:
-                            with patch('google.generativeai.types.GoogleSearchRetrieval', create=True) as mock_google_search_retrieval:
-                                with patch('google.generativeai.types.DynamicRetrievalConfig', create=True) as mock_dynamic_config:
-                                    with patch('google.generativeai.types.DynamicRetrievalConfigMode', create=True) as mock_mode:
-                                        with patch('google.generativeai.types.Tool', create=True) as mock_tool:
-                                            mock_client = MagicMock()
-                                            mock_from_gemini.return_value = mock_client
-                                            mock_model.return_value = MagicMock()
-                                            mock_tool.return_value = MagicMock()
-                                            mock_mode.MODE_DYNAMIC = "MODE_DYNAMIC"
-                                            
-                                            yield {
-                                                'base_agent': mock_base_agent_class,
-                                                'base_agent_instance': mock_base_agent_instance,
-                                                'client': mock_client,
-                                                'from_gemini': mock_from_gemini,
-                                                'model': mock_model,
-                                                'google_search': mock_google_search,
-                                                'google_search_retrieval': mock_google_search_retrieval,
-                                                'tool': mock_tool
-                                            }
\ No newline at end of file
+    with ExitStack() as stack:
+        stack.enter_context(_mocked_base_agent())
+        stack.enter_context(patch('agent.configuration.genai.configure'))
+        mock_from_gemini = stack.enter_context(patch('agent.configuration.instructor.from_gemini'))
+        mock_model = stack.enter_context(patch('agent.configuration.genai.GenerativeModel'))
+        
+        genai_types = {
+            name: stack.enter_context(patch(f'google.generativeai.types.{name}', create=True))
+            for name in ('GoogleSearch', 'GoogleSearchRetrieval', 'DynamicRetrievalConfig',
+                         'DynamicRetrievalConfigMode', 'Tool')
+        }
+        
+        mock_client = MagicMock()
+        mock_from_gemini.return_value = mock_client
+        mock_model.return_value = MagicMock()
+        genai_types['Tool'].return_value = MagicMock()
+        genai_types['DynamicRetrievalConfigMode'].MODE_DYNAMIC = "MODE_DYNAMIC"
+        
+        yield {
+            'base_agent': mock_base_agent_class,
+            'base_agent_instance': mock_base_agent_instance,
+            'client': mock_client,
+            'from_gemini': mock_from_gemini,
+            'model': mock_model,
+            'google_search': genai_types['GoogleSearch'],
+            'google_search_retrieval': genai_types['GoogleSearchRetrieval'],
+            'tool': genai_types['Tool']
+        }
+
+
+@pytest.fixture
+def mock_agent_dependencies(_agent_dependency_patches):
+    """Mock all agent dependencies in one place for cleaner tests."""
+    dependencies = dict(_agent_dependency_patches)
+    # Tests reassign attributes on the client, which reset_mock can't undo - give each its own
+    dependencies['client'] = dependencies['from_gemini'].return_value = MagicMock()
+    
+    yield dependencies
+    
+    # Patches stay installed; only call history is cleared between tests
+    for mock in _agent_dependency_patches.values():
+        if isinstance(mock, MagicMock):
+            mock.reset_mock(return_value=False, side_effect=False)
+
+
+# Session fixtures holding long-lived objects; built before the GC freeze below
+_LONG_LIVED_FIXTURES = (
+    "_sample_query_generation_input_session",
+    "_sample_query_generation_output_session",
+    "_sample_web_search_input_session",
+    "_sample_web_search_output_session",
+    "_sample_reflection_input_session",
+    "_sample_reflection_output_session",
+    "_sample_finalization_input_session",
+    "_sample_finalization_output_session",
+    "_mock_search_api_response_session",
+    "_mock_duckduckgo_response_session",
+    "_test_configuration_session",
+    "mock_httpx_response",
+)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _freeze_gc(request):
+    """Move session-lifetime objects out of the GC's reach so collections only scan per-test garbage."""
+    # Agent dependency patches are deliberately excluded - requesting them here would install them for every test
+    for name in _LONG_LIVED_FIXTURES:
+        request.getfixturevalue(name)
+    
+    gc.collect()
+    gc.freeze()
+    yield
+    gc.unfreeze()
@@ -1,19 +1,26 @@
 """
 Tests for error handling and edge cases in agents.py.
 Tests various failure scenarios, edge cases, and error recovery mechanisms.
+
+Mocks fail immediately rather than after a real delay: do not add
+``asyncio.sleep`` calls with a non-zero delay here (use ``asyncio.sleep(0)``
+if a test needs to yield to the event loop).
 """
 
 import pytest
 import asyncio
 from unittest.mock import patch, MagicMock, AsyncMock
+from types import MappingProxyType, SimpleNamespace
 import sys
 from pathlib import Path
 import httpx
-import json
+import os
+import re
 
-# Add backend src to path
-backend_src = Path(__file__).parent.parent / "backend" / "src"
-sys.path.insert(0, str(backend_src))
+# Add backend src to path (once, even if this module is collected again)
+backend_src = str(Path(__file__).parent.parent / "backend" / "src")
+if backend_src not in sys.path:
+    sys.path.insert(0, backend_src)
 
 from agent.agents import (
     QueryGenerationAgent,
@@ -22,44 +29,10 @@ from agent.agents import (
     FinalizationAgent
 )
 from agent.agents.web_search_agent import get_genai_client
+from agent.search.gemini_search import GeminiSearchProvider
 from agent.search.search_manager import SearchManager, search_web
-from agent.citation.grounding_processor import GroundingProcessor
-from agent.citation.citation_formatter import CitationFormatter
-
-# Create convenience functions for test compatibility
-async def search_with_gemini_grounding(query: str):
-    """Compatibility wrapper for Gemini grounding search."""
-    try:
-        from agent.search.gemini_search import GeminiSearchProvider
-        provider = GeminiSearchProvider()
-        result = await provider.search_with_grounding(query)
-        return result
-    except Exception as e:
-        return {
-            'status': 'error',
-            'error': str(e),
-            'grounding_used': False
-        }
-
-def run_async_search(query: str, num_results: int = 5):
-    """Compatibility wrapper for async search."""
-    import asyncio
-    return asyncio.run(search_web(query, num_results))
-
-def add_inline_citations(response):
-    """Compatibility wrapper for adding inline citations."""
-    formatter = CitationFormatter()
-    return formatter.add_inline_citations(response)
-
-def extract_sources_from_grounding(response):
-    """Compatibility wrapper for extracting sources."""
-    processor = GroundingProcessor()
-    return processor.extract_sources_from_grounding(response)
-
-def create_citations_from_grounding(response):
-    """Compatibility wrapper for creating citations."""
-    processor = GroundingProcessor()
-    return processor.create_citations_from_grounding(response)
+from agent.search.base_provider import SearchResponse, SearchResult, SearchStatus
+from agent.http_client import HTTPClientSingleton
 from agent.state import (
     QueryGenerationInput,
     WebSearchInput,
@@ -70,6 +43,148 @@ from agent.state import (
 )
 from agent.configuration import Configuration
 
+from test._compat import (
+    search_with_gemini_grounding,
+    run_async_search,
+    add_inline_citations,
+    extract_sources_from_grounding,
+    create_citations_from_grounding
+)
+
+
+# Citation count for the default memory test; the full-size variant is marked slow
+CITATION_STRESS_N = int(os.getenv("CITATION_STRESS_N", "10"))
+
+# Expected ValueError messages for the environment/configuration tests
+_RE_MISSING_KEY = re.compile(r"GEMINI_API_KEY is not set")
+_RE_MISSING_EITHER = re.compile(r"GEMINI_API_KEY or GOOGLE_API_KEY must be set")
+_RE_UNSUPPORTED = re.compile(r"Unsupported model")
+
+# Unicode plus special characters, shared by the edge-case input tests
+UNICODE_TOPIC = (
+    "研究主题: AI发展 🤖 \u2013 现状与未来"
+    "Topic with {}, [], (), <>, %, $, #, @, !, ?, *, +, |, \\, /, ^, &"
+)
+
+# Canned grounding results for the tests that stub out Gemini grounding
+_ERR_GROUNDING = MappingProxyType({'status': 'error', 'error': 'Failed', 'grounding_used': False})
+
+
+def _ok_grounding(response):
+    """Successful grounding result wrapping ``response``."""
+    return {
+        'status': 'success',
+        'response': response,
+        'grounding_used': True,
+        'source': 'gemini_grounding'
+    }
+
+
+class _FakeResponse:
+    """Minimal stand-in for httpx.Response as read by the search providers."""
+    
+    def __init__(self, status_code=200, payload=None, exc=None, text=""):
+        self.status_code = status_code
+        self.text = text
+        self._payload = payload
+        self._exc = exc
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        if self._exc is not None:
+            raise self._exc
+        return self._payload
+
+
+def _mock_grounding_response(*, chunks=(), supports=(), text=None):
+    """Build a response whose single candidate carries the given grounding data."""
+    metadata = SimpleNamespace(grounding_chunks=list(chunks), grounding_supports=list(supports))
+    response = MagicMock()
+    if text is not None:
+        response.text = text
+    response.candidates = [SimpleNamespace(grounding_metadata=metadata)]
+    return response
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _silence_print():
+    """Keep the agents' fallback prints out of the test output."""
+    with patch('builtins.print'):
+        yield
+
+
+@pytest.fixture
+def mocked_agent_config(monkeypatch):
+    """Route every Configuration.create_*_config call to one prewired mock."""
+    agent_config = MagicMock()
+    client = MagicMock()
+    agent_config.client = client
+    for name in ("create_agent_config", "create_reflection_config", "create_answer_config"):
+        monkeypatch.setattr(f"agent.configuration.Configuration.{name}", lambda self, *args, **kwargs: agent_config)
+    return SimpleNamespace(cfg=agent_config, client=client)
+
+
+@pytest.fixture
+def failing_gemini_grounding(monkeypatch):
+    """Make the search manager's Gemini provider report a grounding error without calling the API."""
+    grounding = AsyncMock(return_value=_ERR_GROUNDING)
+    monkeypatch.setattr(GeminiSearchProvider, "search_with_grounding", grounding)
+    return grounding
+
+
+@pytest.fixture
+async def mock_transport(monkeypatch):
+    """Serve the shared HTTP client's requests from a handler via httpx.MockTransport.
+
+    Call the returned function with ``handler(request) -> httpx.Response``; the
+    handler may also raise an httpx error. The previous client is restored and the
+    mock clients are closed afterwards.
+    """
+    singleton = HTTPClientSingleton()
+    clients = []
+    
+    def install(handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        clients.append(client)
+        monkeypatch.setattr(singleton, "_client", client)
+        return client
+    
+    yield install
+    
+    for client in clients:
+        await client.aclose()
+
+
+@pytest.fixture(scope="module")
+def success_search_response():
+    """Canned successful SearchResponse, built once per module; do not mutate."""
+    return SearchResponse(
+        status=SearchStatus.SUCCESS,
+        results=[SearchResult(title='Test', url='test.com', snippet='test', source='mock')],
+        query="test query",
+        provider="mock"
+    )
+
+
+@pytest.fixture(scope="module")
+def gemini_types_mock():
+    """Patch the google.generativeai types module once for the whole module."""
+    with patch('google.generativeai.types') as mock_types:
+        # Mock the types module to provide the needed classes
+        mock_types.GoogleSearch.return_value = MagicMock()
+        mock_types.Tool.return_value = MagicMock()
+        mock_types.GenerateContentConfig.return_value = MagicMock()
+        yield mock_types
+
+
+@pytest.fixture
+def mock_get_client():
+    """Patch get_genai_client; each test configures its own client."""
+    with patch('test.test_error_handling.get_genai_client') as mock_get_client:
+        yield mock_get_client
+
 
 class TestEnvironmentErrorHandling:
     """Test error handling for environment and configuration issues."""
@@ -79,7 +194,7 @@ class TestEnvironmentErrorHandling:
         with patch.dict('os.environ', {}, clear=True):
             # Since conftest mocks the API key check, we need to test the actual function
             with patch('os.getenv', return_value=None):
-                with pytest.raises(ValueError, match="GEMINI_API_KEY is not set"):
+                with pytest.raises(ValueError, match=_RE_MISSING_KEY):
                     # This should raise an error when the module-level check happens
                     exec("raise ValueError('GEMINI_API_KEY is not set')")
     
@@ -87,12 +202,12 @@ class TestEnvironmentErrorHandling:
         """Test get_genai_client with no API key available."""
         with patch.dict('os.environ', {}, clear=True):
             with patch('os.getenv', return_value=None):
-                with pytest.raises(ValueError, match="GEMINI_API_KEY or GOOGLE_API_KEY must be set"):
+                with pytest.raises(ValueError, match=_RE_MISSING_EITHER):
                     get_genai_client()
     
     def test_configuration_invalid_model(self, mock_environment):
         """Test configuration with invalid model names."""
-        with pytest.raises(ValueError, match="Unsupported model"):
+        with pytest.raises(ValueError, match=_RE_UNSUPPORTED):
             config = Configuration(
                 query_generator_model="invalid-model-name",
                 reflection_model="gemini-2.5-flash",
@@ -104,83 +219,46 @@ class TestEnvironmentErrorHandling:
 class TestNetworkErrorHandling:
     """Test handling of network-related errors."""
     
-    @pytest.mark.asyncio
-    async def test_gemini_grounding_network_timeout(self, mock_environment):
-        """Test Gemini grounding with network timeout."""
-        with patch('test.test_error_handling.get_genai_client') as mock_get_client:
-            with patch('google.generativeai.types') as mock_types:
-                # Mock the types module to provide the needed classes
-                mock_google_search = MagicMock()
-                mock_tool = MagicMock()
-                mock_config = MagicMock()
-                
-                mock_types.GoogleSearch.return_value = mock_google_search
-                mock_types.Tool.return_value = mock_tool
-                mock_types.GenerateContentConfig.return_value = mock_config
-                
-                mock_client = MagicMock()
-                mock_client.models.generate_content.side_effect = asyncio.TimeoutError("Request timeout")
-                mock_get_client.return_value = mock_client
-                
-                result = await search_with_gemini_grounding("test query")
-                
-                assert result['status'] == 'error'
-                assert 'gemini client not initialized' in result['error'].lower()
-    
-    @pytest.mark.asyncio
-    async def test_gemini_grounding_connection_error(self, mock_environment):
-        """Test Gemini grounding with connection error."""
-        with patch('test.test_error_handling.get_genai_client') as mock_get_client:
-            with patch('google.generativeai.types') as mock_types:
-                # Mock the types module to provide the needed classes
-                mock_google_search = MagicMock()
-                mock_tool = MagicMock()
-                mock_config = MagicMock()
-                
-                mock_types.GoogleSearch.return_value = mock_google_search
-                mock_types.Tool.return_value = mock_tool
-                mock_types.GenerateContentConfig.return_value = mock_config
-                
-                mock_client = MagicMock()
-                mock_client.models.generate_content.side_effect = ConnectionError("Connection failed")
-                mock_get_client.return_value = mock_client
-                
-                result = await search_with_gemini_grounding("test query")
-                
-                assert result['status'] == 'error'
-                assert 'gemini client not initialized' in result['error'].lower()
+    @pytest.mark.parametrize("exc", [
+        asyncio.TimeoutError("Request timeout"),
+        ConnectionError("Connection failed"),
+    ], ids=["timeout", "conn"])
+    async def test_gemini_grounding_network_failure(self, mock_environment, gemini_types_mock, mock_get_client, exc):
+        """Test Gemini grounding with network timeouts and connection errors."""
+        mock_client = MagicMock()
+        mock_client.models.generate_content.side_effect = exc
+        mock_get_client.return_value = mock_client
+        
+        result = await search_with_gemini_grounding("test query")
+        
+        assert result['status'] == 'error'
+        assert 'gemini client not initialized' in result['error'].lower()
     
-    @pytest.mark.asyncio
-    async def test_search_web_all_apis_fail(self, mock_environment):
+    async def test_search_web_all_apis_fail(self, mock_environment, mock_transport, failing_gemini_grounding):
         """Test search_web when all API services fail."""
-        with patch('test.test_error_handling.search_with_gemini_grounding') as mock_grounding:
-            mock_grounding.return_value = {'status': 'error', 'error': 'Grounding failed'}
+        with patch.dict('os.environ', {'GOOGLE_SEARCH_ENGINE_ID': '', 'SEARCHAPI_API_KEY': ''}):
+            def refuse(request):
+                raise httpx.ConnectError("Connection failed", request=request)
+                
+            mock_transport(refuse)
             
-            with patch.dict('os.environ', {'GOOGLE_SEARCH_ENGINE_ID': '', 'SEARCHAPI_API_KEY': ''}):
-                with patch('httpx.AsyncClient') as mock_client_class:
-                    mock_client = AsyncMock()
-                    mock_client.get.side_effect = httpx.ConnectError("Connection failed")
-                    mock_client_class.return_value.__aenter__.return_value = mock_client
-                    
-                    results = await search_web("test query")
-                    
-                    # Should fallback to knowledge base
-                    assert len(results) >= 1
-                    assert results[0]['source'] == 'knowledge_base'
+            results = await search_web("test query")
+            
+            # Should fallback to knowledge base
+            assert len(results) >= 1
+            assert results[0]['source'] == 'knowledge_base'
+            # Gemini was tried (and failed) through the stub, not the live API
+            failing_gemini_grounding.assert_awaited()
     
-    @pytest.mark.asyncio
-    async def test_httpx_client_creation_failure(self, mock_environment):
+    async def test_httpx_client_creation_failure(self, mock_environment, failing_gemini_grounding):
         """Test handling of httpx client creation failures."""
-        with patch('test.test_error_handling.search_with_gemini_grounding') as mock_grounding:
-            mock_grounding.return_value = {'status': 'error', 'error': 'Failed'}
+        with patch('httpx.AsyncClient') as mock_client_class:
+            mock_client_class.side_effect = Exception("Client creation failed")
             
-            with patch('httpx.AsyncClient') as mock_client_class:
-                mock_client_class.side_effect = Exception("Client creation failed")
-                
-                results = await search_web("test query")
-                
-                # Should fallback to knowledge base
-                assert results[0]['source'] == 'knowledge_base'
+            results = await search_web("test query")
+            
+            # Should fallback to knowledge base
+            assert results[0]['source'] == 'knowledge_base'
 
 
 class TestDataCorruptionHandling:
@@ -198,263 +276,198 @@ class TestDataCorruptionHandling:
     
     def test_extract_sources_corrupted_chunks(self):
         """Test extract_sources_from_grounding with corrupted chunk data."""
-        mock_response = MagicMock()
-        mock_candidate = MagicMock()
-        mock_metadata = MagicMock()
-        
         # Create corrupted chunk without proper web attribute
         mock_chunk = MagicMock()
         mock_chunk.web = None  # Corrupted web data
-        mock_metadata.grounding_chunks = [mock_chunk]
-        
-        mock_candidate.grounding_metadata = mock_metadata
-        mock_response.candidates = [mock_candidate]
+        mock_response = _mock_grounding_response(chunks=[mock_chunk])
         
         sources = extract_sources_from_grounding(mock_response)
         assert sources == []  # Should handle corruption gracefully
     
     def test_create_citations_malformed_indices(self):
         """Test create_citations_from_grounding with malformed indices."""
-        mock_response = MagicMock()
-        mock_candidate = MagicMock()
-        mock_metadata = MagicMock()
-        
         # Create support with malformed indices
         mock_support = MagicMock()
         mock_support.segment.start_index = "not_an_integer"
         mock_support.segment.end_index = None
         mock_support.grounding_chunk_indices = [0]
-        
-        mock_metadata.grounding_supports = [mock_support]
-        mock_metadata.grounding_chunks = []
-        mock_candidate.grounding_metadata = mock_metadata
-        mock_response.candidates = [mock_candidate]
+        mock_response = _mock_grounding_response(supports=[mock_support])
         
         citations = create_citations_from_grounding(mock_response)
         assert citations == []  # Should handle malformed data
     
-    @pytest.mark.asyncio
-    async def test_search_web_malformed_json_responses(self):
+    async def test_search_web_malformed_json_responses(self, mock_environment, mock_transport, failing_gemini_grounding):
         """Test search_web handling of malformed JSON responses."""
-        # Local environment setup
-        env_vars = {
-            "GEMINI_API_KEY": "test-gemini-key-12345",
-            "GOOGLE_API_KEY": "test-google-key-12345", 
-            "GOOGLE_SEARCH_ENGINE_ID": "test-engine-id-12345",
-            "SEARCHAPI_API_KEY": "test-searchapi-key-12345"
-        }
-        
-        with patch.dict('os.environ', env_vars, clear=False):
-            with patch('test.test_error_handling.search_with_gemini_grounding') as mock_grounding:
-                mock_grounding.return_value = {'status': 'error', 'error': 'Failed'}
-                
-                with patch('httpx.AsyncClient') as mock_client_class:
-                    mock_client = AsyncMock()
-                    mock_response = AsyncMock()
-                    mock_response.status_code = 200
-                    mock_response.json.side_effect = json.JSONDecodeError("Invalid JSON", "", 0)
-                    mock_client.get.return_value = mock_response
-                    mock_client_class.return_value.__aenter__.return_value = mock_client
-                    
-                    results = await search_web("test query")
-                    
-                    # Should fallback gracefully
-                    assert results[0]['source'] == 'knowledge_base'
+        mock_transport(lambda request: httpx.Response(200, text="{not valid json"))
+        
+        results = await search_web("test query")
+        
+        # Should fallback gracefully
+        assert results[0]['source'] == 'knowledge_base'
 
 
 class TestAgentErrorHandling:
     """Test error handling within individual agents."""
     
-    def test_query_generation_agent_invalid_input_types(self, mock_environment, test_configuration):
+    def test_query_generation_agent_invalid_input_types(self, mock_environment, test_configuration, mocked_agent_config):
         """Test QueryGenerationAgent with invalid input types."""
-        with patch('agent.configuration.AgentConfig') as mock_agent_config_class:
-            mock_agent_config = MagicMock()
-            mock_client = MagicMock()
-            mock_completions = MagicMock()
-            mock_client.chat.completions = mock_completions
-            mock_agent_config.client = mock_client
-            mock_agent_config_class.return_value = mock_agent_config
-            
-            # Test with invalid input that might cause string formatting errors
-            mock_completions.create.side_effect = Exception("Formatting error")
-            
-            # Mock the create_agent_config method on the Configuration class
-            with patch('agent.configuration.Configuration.create_agent_config', return_value=mock_agent_config):
-                with patch('builtins.print'):
-                    agent = QueryGenerationAgent(test_configuration)
-                    
-                    # This might cause issues if not handled properly
-                    invalid_input = QueryGenerationInput(
-                        research_topic="Topic with {invalid} formatting",
-                        number_of_queries=3,
-                        current_date="Date with {invalid} formatting"
-                    )
-                    
-                    result = agent.run(invalid_input)
-                    
-                    # Should fallback gracefully
-                    assert result.queries[0] == "What is Topic with {invalid} formatting?"
+        # Test with invalid input that might cause string formatting errors
+        mocked_agent_config.client.chat.completions.create.side_effect = Exception("Formatting error")
+        
+        agent = QueryGenerationAgent(test_configuration)
+        
+        # This might cause issues if not handled properly
+        invalid_input = QueryGenerationInput(
+            research_topic="Topic with {invalid} formatting",
+            number_of_queries=3,
+            current_date="Date with {invalid} formatting"
+        )
+        
+        result = agent.run(invalid_input)
+        
+        # Should fallback gracefully
+        assert result.queries[0] == "What is Topic with {invalid} formatting?"
     
-    def test_web_search_agent_exception_in_citation_processing(self, mock_environment, test_configuration):
+    def test_web_search_agent_exception_in_citation_processing(self, mock_environment, test_configuration, mocked_agent_config):
         """Test WebSearchAgent when citation processing fails."""
-        with patch('agent.configuration.AgentConfig') as mock_agent_config_class:
-            mock_agent_config = MagicMock()
-            mock_agent_config_class.return_value = mock_agent_config
-            
-            mock_genai_client = MagicMock()
-            
-            with patch('agent.agents.web_search_agent.get_genai_client', return_value=mock_genai_client):
-                # Mock the types module where it's imported in web_search_agent
-                with patch('agent.agents.web_search_agent.types') as mock_types:
-                    mock_google_search = MagicMock()
-                    mock_tool = MagicMock()
-                    mock_types.GoogleSearch.return_value = mock_google_search
-                    mock_types.Tool.return_value = mock_tool
-                    mock_types.GoogleSearchRetrieval.return_value = MagicMock()
-                    mock_types.DynamicRetrievalConfig.return_value = MagicMock()
-                    mock_types.DynamicRetrievalConfigMode.MODE_DYNAMIC = "MODE_DYNAMIC"
+        mock_genai_client = MagicMock()
+        
+        with patch('agent.agents.web_search_agent.get_genai_client', return_value=mock_genai_client):
+            # Mock the types module where it's imported in web_search_agent
+            with patch('agent.agents.web_search_agent.types') as mock_types:
+                mock_google_search = MagicMock()
+                mock_tool = MagicMock()
+                mock_types.GoogleSearch.return_value = mock_google_search
+                mock_types.Tool.return_value = mock_tool
+                mock_types.GoogleSearchRetrieval.return_value = MagicMock()
+                mock_types.DynamicRetrievalConfig.return_value = MagicMock()
+                mock_types.DynamicRetrievalConfigMode.MODE_DYNAMIC = "MODE_DYNAMIC"
+                
+                with patch('test._compat.search_with_gemini_grounding') as mock_grounding:
+                    mock_response = MagicMock()
+                    mock_response.text = "Test response"
+                    mock_grounding.return_value = _ok_grounding(mock_response)
                     
-                    with patch('test.test_error_handling.search_with_gemini_grounding') as mock_grounding:
-                        mock_response = MagicMock()
-                        mock_response.text = "Test response"
-                        mock_grounding.return_value = {
-                            'status': 'success',
-                            'response': mock_response,
-                            'grounding_used': True,
-                            'source': 'gemini_grounding'
-                        }
-                        
-                        # Make both citation functions fail
-                        with patch('test.test_error_handling.extract_sources_from_grounding', side_effect=Exception("Extract failed")):
-                            with patch('test.test_error_handling.add_inline_citations', side_effect=Exception("Citations failed")):
-                                with patch('test.test_error_handling.create_citations_from_grounding', side_effect=Exception("Create failed")):
-                                    with patch('builtins.print'):
-                                        agent = WebSearchAgent(test_configuration)
-                                        input_data = WebSearchInput(
-                                            search_query="test query",
-                                            query_id=1,
-                                            current_date="January 15, 2024"
-                                        )
-                                        
-                                        # Should not crash and should fall back gracefully
-                                        result = agent.run(input_data)
-                                        assert result is not None
-    
-    def test_reflection_agent_with_none_summaries_in_prompt(self, mock_environment, test_configuration):
+                    # Make both citation functions fail
+                    with patch('test._compat.extract_sources_from_grounding', side_effect=Exception("Extract failed")):
+                        with patch('test._compat.add_inline_citations', side_effect=Exception("Citations failed")):
+                            with patch('test._compat.create_citations_from_grounding', side_effect=Exception("Create failed")):
+                                agent = WebSearchAgent(test_configuration)
+                                input_data = WebSearchInput(
+                                    search_query="test query",
+                                    query_id=1,
+                                    current_date="January 15, 2024"
+                                )
+                                
+                                # Should not crash and should fall back gracefully
+                                result = agent.run(input_data)
+                                assert result is not None
+    
+    def test_reflection_agent_with_none_summaries_in_prompt(self, mock_environment, test_configuration, mocked_agent_config):
         """Test ReflectionAgent with None values that might break prompt formatting."""
-        with patch('agent.configuration.AgentConfig') as mock_agent_config_class:
-            mock_client = MagicMock()
-            mock_completions = MagicMock()
-            # Simulate a formatting or processing error
-            mock_completions.create.side_effect = TypeError("Unsupported format")
-            mock_client.chat.completions = mock_completions
-            
-            mock_agent_config = MagicMock()
-            mock_agent_config.client = mock_client
-            mock_agent_config_class.return_value = mock_agent_config
-            
-            # Mock the create_reflection_config method on the Configuration class
-            with patch('agent.configuration.Configuration.create_reflection_config', return_value=mock_agent_config):
-                with patch('builtins.print'):
-                    agent = ReflectionAgent(test_configuration)
-                    
-                    # Test with valid input but cause internal error
-                    input_data = ReflectionInput(
-                        research_topic="valid topic",
-                        summaries=["valid summary"],
-                        current_loop=1
-                    )
-                    
-                    result = agent.run(input_data)
-                    
-                    # Should use fallback
-                    assert result.is_sufficient is True
-                    assert "Research appears sufficient based on available summaries" in result.knowledge_gap
+        # Simulate a formatting or processing error
+        mocked_agent_config.client.chat.completions.create.side_effect = TypeError("Unsupported format")
+        
+        agent = ReflectionAgent(test_configuration)
+        
+        # Test with valid input but cause internal error
+        input_data = ReflectionInput(
+            research_topic="valid topic",
+            summaries=["valid summary"],
+            current_loop=1
+        )
+        
+        result = agent.run(input_data)
+        
+        # Should use fallback
+        assert result.is_sufficient is True
+        assert "Research appears sufficient based on available summaries" in result.knowledge_gap
     
-    def test_finalization_agent_template_error(self, mock_environment, test_configuration):
+    def test_finalization_agent_template_error(self, mock_environment, test_configuration, mocked_agent_config):
         """Test FinalizationAgent with template processing errors."""
-        # Mock the AgentConfig class
-        mock_client = MagicMock()
-        mock_completions = MagicMock()
-        mock_completions.create.side_effect = Exception("Template processing error")
-        mock_client.chat.completions = mock_completions
+        mocked_agent_config.client.chat.completions.create.side_effect = Exception("Template processing error")
         
-        mock_agent_config = MagicMock()
-        mock_agent_config.client = mock_client
+        agent = FinalizationAgent(test_configuration)
         
-        # Mock the create_answer_config method on the Configuration class
-        with patch('agent.configuration.Configuration.create_answer_config', return_value=mock_agent_config):
-            with patch('builtins.print'):
-                agent = FinalizationAgent(test_configuration)
-                
-                # Test with complex input that might cause template issues
-                input_data = FinalizationInput(
-                    research_topic="Complex topic with {braces} and % symbols",
-                    summaries=["Summary with 'quotes' and \"double quotes\""],
-                    sources=[],
-                    current_date="Date with special chars: <>{}%"
-                )
-                
-                result = agent.run(input_data)
-                
-                # Should use fallback - it will use the provided summary since summaries exist
-                assert "Based on the research:" in result.final_answer
-                assert "Summary with 'quotes' and \"double quotes\"" in result.final_answer
+        # Test with complex input that might cause template issues
+        input_data = FinalizationInput(
+            research_topic="Complex topic with {braces} and % symbols",
+            summaries=["Summary with 'quotes' and \"double quotes\""],
+            sources=[],
+            current_date="Date with special chars: <>{}%"
+        )
+        
+        result = agent.run(input_data)
+        
+        # Should use fallback - it will use the provided summary since summaries exist
+        assert "Based on the research:" in result.final_answer
+        assert "Summary with 'quotes' and \"double quotes\"" in result.final_answer
 
 
 class TestConcurrencyErrorHandling:
     """Test error handling in concurrent/async scenarios."""
     
-    def test_run_async_search_thread_pool_error(self):
-        """Test run_async_search when thread pool fails."""
-        with patch('asyncio.get_event_loop') as mock_get_loop:
-            mock_loop = MagicMock()
-            mock_loop.is_running.return_value = True
-            mock_get_loop.return_value = mock_loop
+    def test_run_async_search_falls_back_to_asyncio_run(self):
+        """Test run_async_search falls back to asyncio.run when no loop is running."""
+        def fake_run(coro):
+            # The mock never runs the search_web coroutine, so close it to avoid a never-awaited warning
+            coro.close()
+            return [{"title": "Fallback", "url": "test.com"}]
+        
+        with patch('asyncio.get_running_loop', side_effect=RuntimeError("no running event loop")):
+            with patch('asyncio.run', side_effect=fake_run) as mock_run:
+                result = run_async_search("test query")
+                
+                mock_run.assert_called_once()
+                assert result == [{"title": "Fallback", "url": "test.com"}]
+    
+    async def test_run_async_search_rejects_running_loop(self):
+        """Test run_async_search refuses to nest inside a running event loop."""
+        with patch('test._compat.search_web', new_callable=AsyncMock) as mock_search:
+            with pytest.raises(RuntimeError, match="running event loop"):
+                run_async_search("test query")
+            
+            mock_search.assert_not_called()
+    
+    def test_run_async_search_reuses_given_loop(self, shared_loop):
+        """Test run_async_search runs on the supplied loop instead of asyncio.run."""
+        with patch('test._compat.search_web', new_callable=AsyncMock) as mock_search:
+            mock_search.return_value = [{"title": "Result", "url": "test.com"}]
             
-            with patch('concurrent.futures.ThreadPoolExecutor') as mock_executor_class:
-                mock_executor = MagicMock()
-                mock_executor.__enter__.return_value = mock_executor
-                mock_executor.submit.side_effect = RuntimeError("Thread pool error")
-                mock_executor_class.return_value = mock_executor
+            with patch('asyncio.run') as mock_run:
+                result = run_async_search("test query", loop=shared_loop)
                 
-                # Should fallback to asyncio.run
-                with patch('asyncio.run') as mock_run:
-                    mock_run.return_value = [{"title": "Fallback", "url": "test.com"}]
-                    
-                    result = run_async_search("test query")
-                    
-                    mock_run.assert_called_once()
-                    assert result == [{"title": "Fallback", "url": "test.com"}]
+                mock_run.assert_not_called()
+                mock_search.assert_awaited_once_with("test query", 5)
+                assert result == [{"title": "Result", "url": "test.com"}]
     
-    @pytest.mark.asyncio
-    async def test_search_web_concurrent_failures(self, mock_environment):
+    async def test_search_web_concurrent_failures(self, mock_environment, mock_transport, failing_gemini_grounding):
         """Test search_web when multiple concurrent operations fail."""
-        with patch('test.test_error_handling.search_with_gemini_grounding') as mock_grounding:
-            mock_grounding.return_value = {'status': 'error', 'error': 'Failed'}
+        # Test when multiple HTTP requests fail concurrently
+        def failing_request(request):
+            raise httpx.RequestError("Request failed", request=request)
             
-            # Test when multiple HTTP requests fail concurrently
-            with patch('httpx.AsyncClient') as mock_client_class:
-                async def failing_get(*args, **kwargs):
-                    await asyncio.sleep(0.1)  # Simulate async delay
-                    raise httpx.RequestError("Request failed")
-                
-                mock_client = AsyncMock()
-                mock_client.get.side_effect = failing_get
-                mock_client_class.return_value.__aenter__.return_value = mock_client
-                
-                # Should handle concurrent failures gracefully
-                results = await search_web("test query")
-                assert results[0]['source'] == 'knowledge_base'
+        mock_transport(failing_request)
+        
+        # Should handle concurrent failures gracefully
+        results = await search_web("test query")
+        assert results[0]['source'] == 'knowledge_base'
 
 
 class TestMemoryAndResourceHandling:
     """Test handling of memory and resource-related issues."""
     
     def test_large_response_handling(self, test_helpers):
-        """Test handling of very large responses."""
-        # Create a very large response
-        large_text = "A" * 100000  # 100KB of text
+        """Test handling of large responses."""
+        self._assert_handles_large_response(test_helpers, "A" * 4096)
+    
+    @pytest.mark.slow
+    def test_large_response_handling_full(self, test_helpers):
+        """Test handling of a 100KB response."""
+        self._assert_handles_large_response(test_helpers, "A" * 100000)
+    
+    @staticmethod
+    def _assert_handles_large_response(test_helpers, large_text):
         mock_response = test_helpers.create_mock_response(large_text, has_grounding=True)
         
         # Should handle large responses without issues
@@ -469,17 +482,20 @@ class TestMemoryAndResourceHandling:
     
     def test_memory_intensive_citation_processing(self):
         """Test citation processing with many citations."""
-        mock_response = MagicMock()
-        mock_response.text = "Test text " * 1000  # Repeated text
-        
-        mock_candidate = MagicMock()
-        mock_metadata = MagicMock()
-        
+        self._assert_handles_many_citations(CITATION_STRESS_N)
+    
+    @pytest.mark.slow
+    def test_memory_intensive_citation_processing_full(self):
+        """Test citation processing at the full 100-citation stress size."""
+        self._assert_handles_many_citations(100)
+    
+    @staticmethod
+    def _assert_handles_many_citations(count):
         # Create many chunks and supports
         chunks = []
         supports = []
         
-        for i in range(100):  # Many citations
+        for i in range(count):  # Many citations
             chunk = MagicMock()
             chunk.web.uri = f"https://source{i}.com"
             chunk.web.title = f"Source {i}"
@@ -491,124 +507,98 @@ class TestMemoryAndResourceHandling:
             support.grounding_chunk_indices = [i]
             supports.append(support)
         
-        mock_metadata.grounding_chunks = chunks
-        mock_metadata.grounding_supports = supports
-        mock_candidate.grounding_metadata = mock_metadata
-        mock_response.candidates = [mock_candidate]
+        mock_response = _mock_grounding_response(
+            chunks=chunks, supports=supports, text="Test text " * 1000  # Repeated text
+        )
         
         # Should handle many citations without memory issues
         sources = extract_sources_from_grounding(mock_response)
-        assert len(sources) == 100
+        assert len(sources) == count
         
         citations = create_citations_from_grounding(mock_response)
-        assert len(citations) == 100
+        assert len(citations) == count
 
 
 class TestEdgeCaseInputHandling:
     """Test handling of edge case inputs."""
     
-    def test_empty_string_inputs(self, mock_environment, test_configuration):
+    def test_empty_string_inputs(self, mock_environment, test_configuration, mocked_agent_config):
         """Test agents with empty string inputs."""
-        with patch('agent.configuration.AgentConfig') as mock_agent_config_class:
-            mock_client = MagicMock()
-            mock_completions = MagicMock()
-            mock_client.chat.completions = mock_completions
-            
-            mock_agent_config = MagicMock()
-            mock_agent_config.client = mock_client
-            mock_agent_config_class.return_value = mock_agent_config
-            
-            # Test QueryGenerationAgent with empty topic
-            mock_completions.create.return_value = MagicMock(
-                queries=["fallback query"], rationale="fallback rationale"
-            )
-            
-            query_agent = QueryGenerationAgent(test_configuration)
-            result = query_agent.run(QueryGenerationInput(
-                research_topic="",  # Empty string
-                number_of_queries=1,
-                current_date=""  # Empty date
-            ))
-            
-            assert len(result.queries) >= 1
+        # Test QueryGenerationAgent with empty topic
+        mocked_agent_config.client.chat.completions.create.return_value = MagicMock(
+            queries=["fallback query"], rationale="fallback rationale"
+        )
+        
+        query_agent = QueryGenerationAgent(test_configuration)
+        result = query_agent.run(QueryGenerationInput(
+            research_topic="",  # Empty string
+            number_of_queries=1,
+            current_date=""  # Empty date
+        ))
+        
+        assert len(result.queries) >= 1
     
-    def test_unicode_and_special_character_handling(self, mock_environment, test_configuration):
+    @pytest.mark.parametrize("agent_cls, input_factory", [
+        (QueryGenerationAgent, lambda: QueryGenerationInput(
+            research_topic=UNICODE_TOPIC,
+            number_of_queries=1,
+            current_date="2024年1月15日"
+        )),
+        (ReflectionAgent, lambda: ReflectionInput(
+            research_topic=UNICODE_TOPIC,
+            summaries=[UNICODE_TOPIC],
+            current_loop=1
+        )),
+        (FinalizationAgent, lambda: FinalizationInput(
+            research_topic=UNICODE_TOPIC,
+            summaries=[UNICODE_TOPIC],
+            sources=[],
+            current_date="2024年1月15日"
+        )),
+    ], ids=["query_generation", "reflection", "finalization"])
+    def test_unicode_and_special_character_handling(self, mock_environment, test_configuration,
+                                                    mocked_agent_config, agent_cls, input_factory):
         """Test handling of Unicode and special characters."""
-        with patch('agent.configuration.AgentConfig') as mock_agent_config_class:
-            mock_client = MagicMock()
-            mock_completions = MagicMock()
-            mock_client.chat.completions = mock_completions
-            
-            mock_agent_config = MagicMock()
-            mock_agent_config.client = mock_client
-            mock_agent_config_class.return_value = mock_agent_config
-            
-            # Test with Unicode characters
-            unicode_topic = "研究主题: AI发展 🤖 \u2013 现状与未来"
-            special_chars = "Topic with {}, [], (), <>, %, $, #, @, !, ?, *, +, |, \\, /, ^, &"
-            
-            mock_completions.create.return_value = MagicMock(
-                queries=["unicode query"], rationale="unicode rationale"
-            )
-            
-            agents = [
-                QueryGenerationAgent(test_configuration),
-                ReflectionAgent(test_configuration),
-                FinalizationAgent(test_configuration)
-            ]
-            
-            for agent in agents:
-                if isinstance(agent, QueryGenerationAgent):
-                    input_data = QueryGenerationInput(
-                        research_topic=unicode_topic + special_chars,
-                        number_of_queries=1,
-                        current_date="2024年1月15日"
-                    )
-                    result = agent.run(input_data)
-                    assert result is not None
-    
-    @pytest.mark.asyncio
-    async def test_malformed_urls_in_search_results(self, mock_environment):
+        mocked_agent_config.client.chat.completions.create.return_value = MagicMock(
+            queries=["unicode query"], rationale="unicode rationale"
+        )
+        
+        agent = agent_cls(test_configuration)
+        result = agent.run(input_factory())
+        
+        assert result is not None
+    
+    async def test_malformed_urls_in_search_results(self, mock_environment, mock_transport, failing_gemini_grounding):
         """Test handling of malformed URLs in search results."""
-        with patch('test.test_error_handling.search_with_gemini_grounding') as mock_grounding:
-            mock_grounding.return_value = {'status': 'error', 'error': 'Failed'}
-            
-            with patch('httpx.AsyncClient') as mock_client_class:
-                mock_client = AsyncMock()
-                mock_response = AsyncMock()
-                mock_response.status_code = 200
-                mock_response.json.return_value = {
-                    "items": [
-                        {
-                            "title": "Valid Result",
-                            "link": "not-a-valid-url",  # Malformed URL
-                            "snippet": "Test snippet"
-                        },
-                        {
-                            "title": "Another Result", 
-                            "link": "",  # Empty URL
-                            "snippet": "Another snippet"
-                        }
-                    ]
+        mock_transport(lambda request: httpx.Response(200, json={
+            "items": [
+                {
+                    "title": "Valid Result",
+                    "link": "not-a-valid-url",  # Malformed URL
+                    "snippet": "Test snippet"
+                },
+                {
+                    "title": "Another Result", 
+                    "link": "",  # Empty URL
+                    "snippet": "Another snippet"
                 }
-                mock_client.get.return_value = mock_response
-                mock_client_class.return_value.__aenter__.return_value = mock_client
-                
-                results = await search_web("test query")
-                
-                # Should handle malformed URLs gracefully
-                assert len(results) >= 1
-                for result in results:
-                    # URLs should be handled even if malformed
-                    assert 'url' in result
-                    assert 'title' in result
+            ]
+        }))
+        
+        results = await search_web("test query")
+        
+        # Should handle malformed URLs gracefully
+        assert len(results) >= 1
+        for result in results:
+            # URLs should be handled even if malformed
+            assert 'url' in result
+            assert 'title' in result
 
 
 class TestResourceCleanupAndMemoryLeaks:
     """Test proper resource cleanup and prevention of memory leaks."""
     
-    @pytest.mark.asyncio
-    async def test_httpx_client_cleanup(self, mock_environment):
+    async def test_httpx_client_cleanup(self, mock_environment, success_search_response):
         """Test that httpx clients are properly cleaned up."""
         call_count = 0
         
@@ -616,10 +606,7 @@ class TestResourceCleanupAndMemoryLeaks:
             nonlocal call_count
             call_count += 1
             mock_client = AsyncMock()
-            mock_response = AsyncMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {"items": []}
-            mock_client.get.return_value = mock_response
+            mock_client.get.return_value = _FakeResponse(payload={"items": []})
             
             # Simulate cleanup tracking
             cleanup_mock = AsyncMock()
@@ -630,22 +617,8 @@ class TestResourceCleanupAndMemoryLeaks:
         
         # Mock the search manager to prevent actual HTTP client creation
         with patch('agent.search.search_manager.SearchManager') as mock_search_manager:
-            from agent.search.base_provider import SearchResponse, SearchResult, SearchStatus
-            
             mock_manager = AsyncMock()
-            mock_result = SearchResult(
-                title='Test',
-                url='test.com', 
-                snippet='test',
-                source='mock'
-            )
-            mock_response = SearchResponse(
-                status=SearchStatus.SUCCESS,
-                results=[mock_result],
-                query="test query",
-                provider="mock"
-            )
-            mock_manager.search.return_value = mock_response
+            mock_manager.search.return_value = success_search_response
             mock_search_manager.return_value = mock_manager
             
             with patch('httpx.AsyncClient', side_effect=track_client_creation):